@@ -0,0 +1,123 @@
+import argparse
+import os
+import re
+import sys
+
+from cache import CACHE
+from flag_index import update_index
+from match_bloom import update_bloom
+from matchups import update_matchups
+from metrics import METRICS
+from player_cube import update_cube
+from similarity import update_similarity
+from incremental import MatchHistory
+from length_audit import update_length_audit
+from pipeline import ENGINES, PipelineError, split_matches
+from processing import process_upload
+
+
+# ---------------------------
+# Batch processing (no UI)
+# ---------------------------
+# python batch.py exports/*.csv -o processed/
+# Writes tagged_<Match_No>_<Match_ID>.csv and its QC log for every export.
+# The Match ID is the last number in each file name, unless --match-id is given.
+#
+# python batch.py archive/season_dump.csv --multi --match-id 6464 -o processed/
+# Splits a file of concatenated exports at every 'Name' header row and processes the
+# matches one at a time (Match IDs counting up), writing each one before reading the next.
+#
+# python batch.py exports/*.csv -o processed/ --metrics processed/pkl.prom
+# Also writes the run's metrics (matches, raids, stage latency, QC counts) in Prometheus
+# text format, rewritten after every match so a long run can be watched.
+
+def _match_id(path):
+    numbers = re.findall(r'\d+', os.path.basename(path))
+    if not numbers:
+        raise PipelineError(f"❌ No Match ID in file name '{path}', use --match-id.")
+    return int(numbers[-1])
+
+
+def _exports(path, match_id, multi):
+    # (label, Match ID, raw export bytes) for every match in the file
+    if not multi:
+        with open(path, 'rb') as f:
+            yield path, match_id, f.read()
+        return
+    with open(path, 'rb') as f:
+        for k, content in enumerate(split_matches(f)):
+            yield f"{path} [match {k + 1}]", match_id + k, content
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Process raw Kabaddi exports and run the QCs.")
+    parser.add_argument('files', nargs='+', help="raw semicolon-delimited exports")
+    parser.add_argument('-o', '--out', default='.', help="output folder")
+    parser.add_argument('--match-id', type=int, help="Match ID (only with a single file)")
+    parser.add_argument('--engine', choices=ENGINES, default='pandas')
+    parser.add_argument('--no-cache', action='store_true', help="do not read or write the on-disk cache")
+    parser.add_argument('--index', metavar='DIR', help="add the raids to the season flag index in DIR")
+    parser.add_argument('--cube', metavar='FILE', help="add the match to the player aggregate cube in FILE")
+    parser.add_argument('--similar', metavar='FILE', help="add the raids to the raid similarity index in FILE")
+    parser.add_argument('--matchups', metavar='FILE', help="add the match to the raider x defender matrix in FILE")
+    parser.add_argument('--bloom', action='store_true',
+                        help="write a Bloom filter sidecar per match and update the season manifest in the output folder")
+    parser.add_argument('--lengths', metavar='FILE', help="add the raids to the Raid_Length vs clock audit in FILE")
+    parser.add_argument('--group', help="tagger or venue of these matches, for --lengths (default: the season)")
+    parser.add_argument('--metrics', metavar='FILE', help="write Prometheus metrics of the run to FILE")
+    parser.add_argument('--multi', action='store_true', help="files hold several concatenated matches")
+    args = parser.parse_args(argv)
+
+    if args.match_id is not None and len(args.files) > 1:
+        parser.error("--match-id needs exactly one file")
+
+    os.makedirs(args.out, exist_ok=True)
+    # Every match is written out right away; nothing needs to stay in memory afterwards
+    history = MatchHistory(max_matches=0)
+    failed = 0
+    for path in args.files:
+        try:
+            first_id = args.match_id if args.match_id is not None else _match_id(path)
+        except PipelineError as e:
+            print(f"{path}: {e}", file=sys.stderr)
+            failed += 1
+            continue
+
+        for label, match_id, content in _exports(path, first_id, args.multi):
+            try:
+                result = process_upload(content, match_id, engine=args.engine,
+                                        cache=None if args.no_cache else CACHE, history=history)
+            except PipelineError as e:
+                print(f"{label}: {e}", file=sys.stderr)
+                failed += 1
+                if args.metrics:
+                    METRICS.dump(args.metrics)
+                continue
+
+            version = result.version
+            csv_path = os.path.join(args.out, result.file_name)
+            result.processed.to_csv(csv_path, index=False)
+            qc_name = result.file_name[:-len(".csv")] + "_qc.txt"
+            with open(os.path.join(args.out, qc_name), 'w', encoding='utf-8') as f:
+                f.write(result.report)
+            if args.index:
+                update_index(args.index, version)
+            if args.cube:
+                update_cube(args.cube, version)
+            if args.similar:
+                update_similarity(args.similar, version)
+            if args.matchups:
+                update_matchups(args.matchups, version)
+            if args.bloom:
+                update_bloom(csv_path, result.processed)
+            if args.lengths:
+                update_length_audit(args.lengths, version, args.group)
+            if args.metrics:
+                METRICS.dump(args.metrics)
+            print(f"{label}: {len(version.processed)} raids, {len(version.violations)} QC messages → {result.file_name}")
+
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,149 @@
+import hashlib
+import os
+import shutil
+import tempfile
+import threading
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+from pipeline import PIPELINE_VERSION
+from qc import Violation
+
+
+# ---------------------------
+# On-disk cache of processed matches
+# ---------------------------
+# Keyed by (raw file content hash, Match ID, pipeline version). One entry is a folder:
+#
+#   flags.npy          parsed flag matrix (raid rows x FLAG_COLUMNS, uint8)
+#   teams.npy          raw Team of every raid
+#   fingerprints.npy   per-row raw hashes (see incremental.py)
+#   processed.parquet  transformed frame, before finalize()
+#   qc.parquet         QC Violation table
+#
+# Entries live under a folder per pipeline version; folders of other versions are
+# deleted on first use. Least recently used entries go first once the size cap is hit.
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# Files whose rules decide the output; editing any of them starts a fresh cache
+RULE_FILES = ['layout.py', 'lineup.py', 'pipeline.py', 'polars_backend.py', 'qc.py', 'stages.py', 'timeline.py']
+
+DEFAULT_DIR = os.environ.get('PKL_CACHE_DIR', os.path.join(HERE, '.pkl_cache'))
+DEFAULT_MAX_MB = float(os.environ.get('PKL_CACHE_MB', 512))
+
+CachedMatch = namedtuple('CachedMatch', ['flags', 'teams', 'fingerprints', 'processed', 'violations'])
+
+
+def rules_version():
+    h = hashlib.sha256(f"v{PIPELINE_VERSION}".encode())
+    for name in RULE_FILES:
+        with open(os.path.join(HERE, name), 'rb') as f:
+            h.update(f.read())
+    return h.hexdigest()[:16]
+
+
+def content_hash(content):
+    return hashlib.sha256(content).hexdigest()
+
+
+def _size(path):
+    return sum(os.path.getsize(os.path.join(path, name)) for name in os.listdir(path))
+
+
+class ResultCache:
+
+    def __init__(self, root=DEFAULT_DIR, max_mb=DEFAULT_MAX_MB):
+        self.root = root
+        self.max_bytes = int(max_mb * 2**20)
+        self.version = rules_version()
+        self.dir = os.path.join(root, self.version)
+        self._lock = threading.Lock()
+        self._checked = False
+
+    def _entry(self, content, match_id):
+        return os.path.join(self.dir, f"{content_hash(content)[:32]}-{match_id}")
+
+    def _drop_old_versions(self):
+        with self._lock:
+            if self._checked or not os.path.isdir(self.root):
+                return
+            for name in os.listdir(self.root):
+                path = os.path.join(self.root, name)
+                if name != self.version and os.path.isdir(path) and not name.startswith('.'):
+                    shutil.rmtree(path, ignore_errors=True)
+            self._checked = True
+
+    def get(self, content, match_id):
+        self._drop_old_versions()
+        path = self._entry(content, match_id)
+        if not os.path.isdir(path):
+            return None
+        try:
+            qc_table = pd.read_parquet(os.path.join(path, 'qc.parquet'))
+            cached = CachedMatch(
+                np.load(os.path.join(path, 'flags.npy')),
+                np.load(os.path.join(path, 'teams.npy')),
+                np.load(os.path.join(path, 'fingerprints.npy')),
+                pd.read_parquet(os.path.join(path, 'processed.parquet')),
+                [Violation(int(qc), kind, int(row), event, line)
+                 for qc, kind, row, event, line in qc_table.itertuples(index=False)],
+            )
+        except (OSError, ValueError):
+            # Half-written or damaged entry: forget it
+            shutil.rmtree(path, ignore_errors=True)
+            return None
+
+        # Mark as recently used
+        os.utime(path)
+        return cached
+
+    def put(self, content, match_id, version):
+        # version: incremental.MatchVersion of this content
+        self._drop_old_versions()
+        path = self._entry(content, match_id)
+        if os.path.isdir(path):
+            os.utime(path)
+            return
+
+        os.makedirs(self.dir, exist_ok=True)
+        tmp = tempfile.mkdtemp(prefix='.tmp-', dir=self.dir)
+        try:
+            np.save(os.path.join(tmp, 'flags.npy'), version.flags)
+            np.save(os.path.join(tmp, 'teams.npy'), version.teams)
+            np.save(os.path.join(tmp, 'fingerprints.npy'), version.fingerprints)
+            version.processed.to_parquet(os.path.join(tmp, 'processed.parquet'), index=False)
+            pd.DataFrame(version.violations, columns=Violation._fields).astype(
+                {'qc': int, 'row': int}).to_parquet(os.path.join(tmp, 'qc.parquet'), index=False)
+            os.replace(tmp, path)
+        except Exception:
+            # Another process stored the same entry first (OSError), or a column could not be
+            # written (pyarrow errors on mixed-type columns): the upload goes on uncached
+            shutil.rmtree(tmp, ignore_errors=True)
+        self.evict()
+
+    def evict(self):
+        # Drop least recently used entries until the cache fits in max_bytes
+        with self._lock:
+            if not os.path.isdir(self.dir):
+                return
+            entries = []
+            for name in os.listdir(self.dir):
+                path = os.path.join(self.dir, name)
+                if not name.startswith('.') and os.path.isdir(path):
+                    entries.append((os.path.getmtime(path), _size(path), path))
+
+            total = sum(size for _, size, _ in entries)
+            for _, size, path in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                shutil.rmtree(path, ignore_errors=True)
+                total -= size
+
+    def clear(self):
+        shutil.rmtree(self.root, ignore_errors=True)
+
+
+CACHE = ResultCache()
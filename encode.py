@@ -0,0 +1,343 @@
+import re
+import sys
+
+import numpy as np
+import pandas as pd
+
+from layout import (RAW_COLUMNS, FLAG_COLUMNS, RAID_COLS, DEFENDER_COLS, RT_COLS, DT_COLS, DSO_COLS, RL_COLS,
+                    BONUS_COLS, LABEL_GROUPS, NAME_COLS)
+from pipeline import PipelineError
+from timeline import clock, duration_seconds
+
+
+# ---------------------------
+# Processed frame → raw export (inverse of the transform)
+# ---------------------------
+# Re-encodes a processed match, e.g. after correcting Outcome, Zone_of_Action, skills,
+# Defender_Position, points or Raid_Length by hand, into the 122-column raw layout, so the
+# correction can go back through the pipeline and QC and be re-imported into the tagging tool:
+#
+#   raw = encode(processed, raw=original)        # frame with layout.RAW_COLUMNS, as extract_raids gives
+#   write_export(raw, "corrected.csv")
+#
+#   python encode.py processed/tagged_1_6464.csv -o corrected.csv [--raw export.csv] [--qc]
+#
+# Numbers are split over their weighted flags (Raid 1-3, D1-D7, RT, DT, DS, RL) and set in
+# one assignment on a rows x 122 matrix. Joined labels are read once per distinct value into
+# a table of flag rows (through LABEL_INDEX: output column → label → raw column), which is
+# then indexed with every raid's value.
+#
+# The processed frame has no Team column, the number in front of each player name, or the
+# milliseconds of Start/Stop, and its Time is Stop - Start rather than the raw Time cell. They
+# are taken from raw (the original export) when given: Time, Start/Stop and Player are kept
+# for raids where Video_Link/Time and the names still match, and every flag cell that still
+# reads the same (flag or whole group), so an uncorrected raid comes back cell for cell.
+# Otherwise Start/Stop are rebuilt from Video_Link and Time, and player numbers are looked
+# up by name in the rest of the match.
+
+
+class EncodeError(PipelineError):
+    # A processed value has no raw encoding (unknown label, number out of range)
+    pass
+
+
+# Output column → label (casefolded) → raw column position
+LABEL_INDEX = {col: {label.casefold(): RAW_COLUMNS.index(label) for label in labels}
+               for col, (labels, _) in LABEL_GROUPS.items()}
+
+# Longest label first, so 'Z10' is not read as 'Z1' and 'Centre Bonus' not as 'Bonus'
+LABEL_PATTERNS = {col: re.compile(r'(?<!\w)(?:' + '|'.join(re.escape(label) for label in sorted(labels, key=len, reverse=True))
+                                  + r')(?!\w)', re.IGNORECASE)
+                  for col, (labels, _) in LABEL_GROUPS.items()}
+
+# Raw columns that only hold 0/1 flags
+FLAG_ONLY = [c for c in FLAG_COLUMNS if c not in ('Technical Point', 'All Out')]
+
+# Output column → (raw columns, flag weights, write the 0 flag)
+WEIGHTED = {
+    'Raid_Number': (RAID_COLS, [1, 2, 3], False),
+    'Number_of_Defenders': (DEFENDER_COLS, list(range(1, 8)), False),
+    'Raiding_Team_Points': (RT_COLS, list(range(10)), True),
+    'Defending_Team_Points': (DT_COLS, list(range(5)), True),
+    'Number_of_Defenders_Self_Out': (DSO_COLS, list(range(4)), True),
+}
+
+# Groups the transform sums, as (positions in FLAG_ONLY, weights)
+SUM_GROUPS = [([FLAG_ONLY.index(c) for c in cols], np.array(weights))
+              for cols, weights, _ in [*WEIGHTED.values(), (RL_COLS, list(range(1, 31)), False)]]
+BONUS_IDX = [FLAG_ONLY.index(c) for c in BONUS_COLS]
+BONUS_GROUP = BONUS_IDX + [FLAG_ONLY.index('No Bonus')]
+
+
+def _numbers(processed, col):
+    return pd.to_numeric(processed[col], errors='coerce')
+
+
+def _whole(values, missing):
+    # Missing values read as `missing` (the transform's fillna); True where not a whole number
+    values = values.fillna(missing)
+    return values, (values != values.round()).to_numpy()
+
+
+def _text(series):
+    return series.fillna('').astype(str).str.strip()
+
+
+def _fail(processed, rows, message):
+    events = processed['Event_Number'].iloc[rows[:5]].astype(str).tolist()
+    more = f" (+{len(rows) - 5} more)" if len(rows) > 5 else ''
+    raise EncodeError(f"❌ {message}: {', '.join(events)}{more}")
+
+
+def _split(values, weights):
+    # Flags whose weights add up to each value, largest weight first: one flag when the value
+    # is a weight, else several (the transform sums every set flag). left != 0: not possible
+    left = values.copy()
+    out = []
+    for w in sorted(weights, reverse=True):
+        if w > 0:
+            take = left >= w
+            out.append((w, take))
+            left = left - w * take
+    return out, left
+
+
+# ------ Flags ------
+
+def _weighted_flags(processed, rows, cols):
+    for col, (raw_cols, weights, zero_flag) in WEIGHTED.items():
+        values, bad = _whole(_numbers(processed, col), 0)
+        values = values.astype(int).to_numpy()
+        parts, left = _split(np.maximum(values, 0), weights)
+        bad = bad | (values < 0) | (left != 0)
+        if bad.any():
+            _fail(processed, np.flatnonzero(bad), f"{col} can not be tagged")
+        for w, take in parts:
+            rows.append(np.flatnonzero(take))
+            cols.append(np.full(take.sum(), RAW_COLUMNS.index(raw_cols[weights.index(w)])))
+        if zero_flag:
+            zero = np.flatnonzero(values == 0)
+            rows.append(zero)
+            cols.append(np.full(len(zero), RAW_COLUMNS.index(raw_cols[0])))
+
+    # Raid_Length = 30 - RL flags; 30 has no RL flag
+    length, bad = _whole(_numbers(processed, 'Raid_Length'), 30)
+    values = 30 - length.astype(int).to_numpy()
+    parts, left = _split(np.maximum(values, 0), list(range(1, 31)))
+    bad = bad | (values < 0) | (left != 0)
+    if bad.any():
+        _fail(processed, np.flatnonzero(bad), "Raid_Length can not be tagged")
+    for w, take in parts:
+        rows.append(np.flatnonzero(take))
+        cols.append(np.full(take.sum(), RAW_COLUMNS.index(RL_COLS[w - 1])))
+
+
+def _label_table(processed, col, values):
+    # One row of flags per distinct value of col (a match only has a few dozen), and the
+    # position of every raid's value in it
+    codes, distinct = pd.factorize(values.fillna(''))
+    pattern = LABEL_PATTERNS[col]
+    table = np.zeros((len(distinct), len(RAW_COLUMNS)), dtype=bool)
+    for i, value in enumerate(distinct):
+        value = str(value)
+        if re.sub(r'[\s,]+', '', pattern.sub('', value)):
+            _fail(processed, np.flatnonzero(codes == i), f"Unknown {col} '{value.strip()}'")
+        table[i, [LABEL_INDEX[col][label.casefold()] for label in pattern.findall(value)]] = True
+    return table, codes
+
+
+def _label_flags(processed, flags):
+    bonus = _text(processed['Bonus']).str.casefold()
+    no_bonus = bonus.str.contains(r'\bno\b')
+    yes_bonus = bonus.str.contains(r'\byes\b')
+
+    for col in LABEL_PATTERNS:
+        values = processed[col]
+        if col == 'Type_of_Bonus':
+            # Bonus decides whether there was a bonus; Type_of_Bonus which one
+            values = _text(values).where(~no_bonus | yes_bonus, '')
+            values = values.where(~yes_bonus | (values != ''), 'Bonus')
+        table, codes = _label_table(processed, col, values)
+        flags |= table[codes]
+    flags[no_bonus.to_numpy(), RAW_COLUMNS.index('No Bonus')] = True
+
+
+def flag_cells(processed):
+    # Raid rows x 122 cells of '0' / '1' (encode fills in the text columns)
+    rows, cols = [], []
+    _weighted_flags(processed, rows, cols)
+    flags = np.zeros((len(processed), len(RAW_COLUMNS)), dtype=bool)
+    flags[np.concatenate(rows).astype(int), np.concatenate(cols).astype(int)] = True
+    _label_flags(processed, flags)
+    return np.where(flags, '1', '0').astype(object)
+
+
+# ------ Text columns ------
+
+def _seconds(series):
+    # Raw Start/Stop ("mm:ss,ms" or "hh:mm:ss,ms") → whole seconds, as the transform reads them
+    parts = series.fillna('').astype(str).str.split(',').str[0].str.split(':', expand=True)
+    parts = parts.reindex(columns=range(3)).apply(pd.to_numeric, errors='coerce')
+    mm_ss = parts[0] * 60 + parts[1]
+    return pd.Series(np.where(parts[2].isna(), mm_ss, mm_ss * 60 + parts[2]), index=series.index)
+
+
+def _set(cells):
+    # Raw flag cells → set or not, as pipeline.flag_matrix reads them (each distinct cell parsed once)
+    codes, distinct = pd.factorize(cells.to_numpy(dtype=object).ravel())
+    is_set = pd.to_numeric(pd.Series(distinct, dtype=object), errors='coerce').eq(1).to_numpy()
+    return np.append(is_set, False)[codes].reshape(cells.shape)
+
+
+def _bonus_code(flags):
+    # What the transform makes of the bonus flags: Bonus Yes / No, and each Type_of_Bonus label
+    bonus = flags[:, BONUS_IDX]
+    yes = bonus.any(axis=1)
+    no = flags[:, FLAG_ONLY.index('No Bonus')] | ~yes
+    return yes * 1 + no * 2 + bonus @ (4 << np.arange(len(BONUS_IDX)))
+
+
+def _same_flags(old, new):
+    # old/new: rows x FLAG_ONLY flags. True where old's cell can stay: the flag is the same, or
+    # its whole group reads as the same value (e.g. D3 + D4 or D7 = 7, no bonus flag or No Bonus)
+    same = old == new
+    for idx, weights in SUM_GROUPS:
+        same[:, idx] |= (old[:, idx] @ weights == new[:, idx] @ weights)[:, None]
+    same[:, BONUS_GROUP] |= (_bonus_code(old) == _bonus_code(new))[:, None]
+    return same
+
+
+def _cell(series):
+    # Numbers without a trailing .0, missing as blank
+    numbers = pd.to_numeric(series, errors='coerce')
+    whole = numbers.notna() & (numbers == numbers.round())
+    text = series.astype(object).where(series.notna(), '').astype(str)
+    return text.where(~whole, numbers.where(whole, 0).astype('int64').astype(str))
+
+
+def _player_numbers(raw_players):
+    # Title-cased name → the number written in front of it in the export
+    tokens = pd.Series(raw_players.dropna().astype(str).unique()).str.split(r'\s*\|\s*').explode().str.split('-', n=1)
+    tokens = tokens[tokens.str.len() == 2]
+    return dict(zip(tokens.str[1].str.strip().str.title(), tokens.str[0].str.strip()))
+
+
+def _players(processed, numbers=None):
+    # Raider and defender names of each raid joined as in 'Player' ("3-Pawan Sehrawat | 7-..."),
+    # or, without numbers, just the names joined with '|'
+    rows = processed[NAME_COLS].to_numpy(dtype=object).tolist()
+    if numbers is None:
+        joined = ['|'.join(n for n in row if isinstance(n, str)) for row in rows]
+    else:
+        joined = [' | '.join(f"{numbers.get(n, '')}-{n}" for n in row if isinstance(n, str)) for row in rows]
+    return pd.Series(joined, index=processed.index, dtype=object)
+
+
+def encode(processed, raw=None, teams=None):
+    # processed: one match as saved by the pipeline (RangeIndex). raw: the original raid rows
+    # (extract_raids), matched by Event_Number. teams: raiding team per raid (default: raw Team)
+    processed = processed.reset_index(drop=True)
+    out = pd.DataFrame(flag_cells(processed), columns=RAW_COLUMNS)
+
+    event = _text(processed['Event_Number'])
+    out['Name'] = event
+    out['Time'] = _text(processed['Time'])
+    out['Technical Point'] = _cell(processed['Technical_Point'])
+    out['All Out'] = _cell(processed['All_Out'])
+
+    start = _numbers(processed, 'Video_Link')
+    length = duration_seconds(processed['Time'])
+    if start.isna().any() or length.isna().any():
+        _fail(processed, np.flatnonzero(start.isna() | length.isna()), "Video_Link / Time is not a time")
+    out['Start'] = [clock(s) + ',000' for s in start]
+    out['Stop'] = [clock(s) + ',000' for s in start + length]
+
+    players = None
+    if raw is not None:
+        original = raw.assign(Name=raw['Name'].astype(str).str.strip()).drop_duplicates('Name').set_index('Name')
+        original = original.reindex(event)
+        original.index = processed.index
+
+        # Keep the exact Time/Start/Stop cells where the times were not changed
+        raw_start = _seconds(original['Start'])
+        same_time = (raw_start == start) & (_seconds(original['Stop']) - raw_start == length)
+        for col in ['Time', 'Start', 'Stop']:
+            out.loc[same_time, col] = original.loc[same_time, col]
+
+        # Keep the original cells ('', '1.0', ...) that still read the same, so re-importing only
+        # changes what was corrected
+        found = event.isin(raw['Name'].astype(str).str.strip()).to_numpy()[:, None]
+        cells = original[FLAG_ONLY]
+        same = _same_flags(_set(cells), (out[FLAG_ONLY] == '1').to_numpy())
+        out[FLAG_ONLY] = out[FLAG_ONLY].where(~(same & found), cells)
+        for col in ['Technical Point', 'All Out']:
+            same = pd.to_numeric(original[col], errors='coerce').fillna(0) == pd.to_numeric(out[col], errors='coerce').fillna(0)
+            out.loc[same & found[:, 0], col] = original.loc[same & found[:, 0], col]
+
+        numbers = _player_numbers(raw['Player'])
+        players = _players(processed, numbers)
+        derived = original['Player'].fillna('').astype(str).str.split(r'\s*\|\s*').map(
+            lambda tokens: '|'.join(t.split('-', 1)[1].strip().title() for t in tokens if '-' in t))
+        same_names = original['Player'].notna() & (derived == _players(processed))
+        players = players.where(~same_names, original['Player'])
+        if teams is None:
+            teams = original['Team'].fillna('')
+    out['Player'] = players if players is not None else _players(processed, {})
+    out['Team'] = '' if teams is None else list(teams)
+    return out[RAW_COLUMNS]
+
+
+# ------ Export file ------
+
+def export_text(raw, preamble=None):
+    # Semicolon-delimited export: preamble lines (read_raw skips the first), 'Name' header, raids
+    lines = list(preamble or ['Export' + ';' * (len(RAW_COLUMNS) - 1)])
+    lines.append(';'.join(RAW_COLUMNS))
+    body = raw[RAW_COLUMNS].to_csv(sep=';', header=False, index=False, lineterminator='\n')
+    return '\n'.join(lines) + '\n' + body
+
+
+def write_export(raw, path, preamble=None):
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        f.write(export_text(raw, preamble))
+
+
+def read_preamble(path):
+    # The lines above the 'Name' header of an export
+    lines = []
+    with open(path, encoding='utf-8-sig', errors='replace') as f:
+        for line in f:
+            if line.split(';', 1)[0].strip() == 'Name':
+                break
+            lines.append(line.rstrip('\r\n'))
+    return lines
+
+
+# python encode.py processed/tagged_1_6464.csv -o corrected.csv [--raw export.csv] [--qc]
+if __name__ == '__main__':
+    import argparse
+    from incremental import raiding_teams
+    from pipeline import extract_raids, flag_matrix, read_raw, transform
+    from qc import report, run_qcs
+
+    parser = argparse.ArgumentParser(description="Re-encode a processed match into the raw export layout.")
+    parser.add_argument('processed')
+    parser.add_argument('-o', '--out', required=True)
+    parser.add_argument('--raw', help="original export (team, player numbers and exact times)")
+    parser.add_argument('--qc', action='store_true', help="run the pipeline and QC on the result")
+    args = parser.parse_args()
+
+    processed = pd.read_csv(args.processed)
+    original = extract_raids(read_raw(args.raw)) if args.raw else None
+    try:
+        raw = encode(processed, original)
+    except EncodeError as e:
+        sys.exit(str(e))
+    write_export(raw, args.out, read_preamble(args.raw) if args.raw else None)
+    print(f"{len(raw)} raids → {args.out}")
+
+    if args.qc:
+        reread = extract_raids(read_raw(args.out))
+        match_id = int(str(processed['Match_ID'].iloc[0]).lstrip('M'))
+        df = transform(reread, match_id)
+        print(report(run_qcs(df, flag_matrix(reread), teams=raiding_teams(reread))))
@@ -0,0 +1,165 @@
+import os
+import threading
+import weakref
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+from cache import content_hash
+
+
+# ---------------------------
+# Shared frame store (one copy per distinct export, for all sessions)
+# ---------------------------
+# Parsed and processed frames are kept once per process as Arrow tables, keyed by the hash
+# of the uploaded file. Sessions hold FrameRef handles instead of their own DataFrames, so a
+# coach and three analysts on the same match share one copy.
+#
+#   ref = STORE.acquire(raw_key(content), lambda: read_raw(io.BytesIO(content)))
+#   ref.table()      # Arrow table (st.dataframe shows it as-is)
+#   ref.frame()      # pandas copy for this call only
+#   ref.release()    # also done when the handle is garbage collected (tab closed)
+#
+# Frames nobody holds a handle to stay around for the next session until the memory
+# budget is exceeded; then the least recently used go first. Held frames are never evicted.
+
+DEFAULT_MAX_MB = float(os.environ.get('PKL_STORE_MB', 256))
+
+
+def raw_key(content):
+    return ('raw', content_hash(content))
+
+
+def processed_key(content, match_id):
+    return ('processed', content_hash(content), str(match_id))
+
+
+def _to_arrow(df):
+    # (Arrow table, original column labels), or (df, labels) when Arrow can't hold a column
+    try:
+        return pa.Table.from_pandas(df, preserve_index=False), list(df.columns)
+    except (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError):
+        return df.copy(), list(df.columns)
+
+
+class _Entry:
+    __slots__ = ('data', 'columns', 'nbytes', 'refs')
+
+    def __init__(self, df):
+        self.data, self.columns = _to_arrow(df)
+        self.nbytes = self.data.nbytes if isinstance(self.data, pa.Table) \
+            else int(self.data.memory_usage(deep=True).sum())
+        self.refs = 0
+
+
+class FrameRef:
+    # One session's handle on a stored frame
+
+    def __init__(self, store, key, entry):
+        self.key = key
+        self._entry = entry
+        self._release = weakref.finalize(self, store._release, key, entry)
+
+    @property
+    def shape(self):
+        return (self._entry.data.num_rows if isinstance(self._entry.data, pa.Table) else len(self._entry.data),
+                len(self._entry.columns))
+
+    @property
+    def released(self):
+        return not self._release.alive
+
+    def table(self):
+        data = self._entry.data
+        return data if isinstance(data, pa.Table) else pa.Table.from_pandas(data.astype(str), preserve_index=False)
+
+    def frame(self):
+        # A new DataFrame equal to the stored one (missing cells back as NaN, like read_raw)
+        data = self._entry.data
+        if not isinstance(data, pa.Table):
+            return data.copy()
+        df = data.to_pandas()
+        df.columns = self._entry.columns
+        for i in np.flatnonzero(df.dtypes.to_numpy() == object):
+            values = df.iloc[:, i].to_numpy(copy=True)
+            values[pd.isna(values)] = np.nan
+            df.isetitem(i, values)
+        return df
+
+    def release(self):
+        self._release()
+
+
+class FrameStore:
+
+    def __init__(self, max_mb=DEFAULT_MAX_MB):
+        self.max_bytes = int(max_mb * 2**20)
+        self._entries = OrderedDict()       # key → _Entry, least recently used first
+        self._building = {}                 # key → lock held while one session builds it
+        # Reentrant: a handle collected while this thread holds the lock releases itself
+        self._lock = threading.RLock()
+
+    def _ref(self, key, entry):
+        # Caller holds self._lock
+        entry.refs += 1
+        self._entries.move_to_end(key)
+        return FrameRef(self, key, entry)
+
+    def acquire(self, key, build):
+        # Handle on the frame stored under key; build() makes it if missing.
+        # Sessions asking for the same key at once wait for a single build
+        with self._lock:
+            if key in self._entries:
+                return self._ref(key, self._entries[key])
+            building = self._building.setdefault(key, threading.Lock())
+
+        with building:
+            try:
+                with self._lock:
+                    if key in self._entries:
+                        return self._ref(key, self._entries[key])
+                entry = _Entry(build())
+                with self._lock:
+                    self._entries[key] = entry
+                    ref = self._ref(key, entry)
+                    self._evict()
+                    return ref
+            finally:
+                # Also when build() raises (a bad upload), so no lock is left behind per failed key
+                with self._lock:
+                    if self._building.get(key) is building:
+                        del self._building[key]
+
+    def get(self, key):
+        # Handle on an already stored frame, or None
+        with self._lock:
+            entry = self._entries.get(key)
+            return None if entry is None else self._ref(key, entry)
+
+    def _release(self, key, entry):
+        with self._lock:
+            entry.refs -= 1
+            if self._entries.get(key) is entry:
+                self._evict()
+
+    def _evict(self):
+        # Caller holds self._lock. Drops unreferenced frames, oldest first, until under budget
+        total = sum(e.nbytes for e in self._entries.values())
+        for key in [k for k, e in self._entries.items() if e.refs == 0]:
+            if total <= self.max_bytes:
+                break
+            total -= self._entries.pop(key).nbytes
+
+    def stats(self):
+        with self._lock:
+            entries = list(self._entries.values())
+            return {'frames': len(entries),
+                    'held': sum(1 for e in entries if e.refs),
+                    'refs': sum(e.refs for e in entries),
+                    'mb': round(sum(e.nbytes for e in entries) / 2**20, 2),
+                    'max_mb': round(self.max_bytes / 2**20, 2)}
+
+
+STORE = FrameStore()
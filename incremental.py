@@ -0,0 +1,175 @@
+import difflib
+import threading
+import time
+from collections import Counter, OrderedDict, namedtuple
+
+import numpy as np
+import pandas as pd
+
+from metrics import lap
+from pipeline import flag_matrix, transform
+from qc import CHECKS, LINEUP_CHECKS, WINDOW, run_qcs, sort_violations
+
+
+# ---------------------------
+# Diff-aware re-processing for corrected re-uploads
+# ---------------------------
+# Every raid row is fingerprinted from its raw cells. When the same Match ID is
+# uploaded again, only the changed rows are transformed again, and only the
+# changed rows ±2 (the reach of QC 4-7) are checked again. The lineup QCs (27-29) follow
+# the whole match, so they always run again over every row.
+
+MatchVersion = namedtuple('MatchVersion', ['raw', 'fingerprints', 'processed', 'violations', 'flags', 'teams'])
+Delta = namedtuple('Delta', ['changed', 'rows_before', 'fixed', 'still_failing', 'introduced'])
+
+
+def fingerprint(raw):
+    # One 64-bit hash per raid row, over all of its raw cells
+    return pd.util.hash_pandas_object(raw, index=False).to_numpy()
+
+
+def raiding_teams(raw):
+    # The processed frame drops the raw Team column; keep it per raid
+    return raw['Team'].fillna('').astype(str).str.strip().to_numpy(str)
+
+
+class MatchHistory:
+    # Last processed version per Match ID (most recently used kept, oldest dropped)
+
+    def __init__(self, max_matches=50):
+        self.max_matches = max_matches
+        self._versions = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, match_id):
+        with self._lock:
+            version = self._versions.get(match_id)
+            if version is not None:
+                self._versions.move_to_end(match_id)
+            return version
+
+    def put(self, match_id, version):
+        with self._lock:
+            self._versions[match_id] = version
+            self._versions.move_to_end(match_id)
+            while len(self._versions) > self.max_matches:
+                self._versions.popitem(last=False)
+
+
+HISTORY = MatchHistory()
+
+
+def _align(old, new):
+    # src[j] = old row reused for new row j (-1 if new/changed); spans = edited new row ranges
+    src = np.full(len(new), -1)
+    spans = []
+    if len(old) == len(new):
+        same = old == new
+        src[same] = np.flatnonzero(same)
+        spans = [(j, j + 1) for j in np.flatnonzero(~same)]
+    else:
+        matcher = difflib.SequenceMatcher(None, old.tolist(), new.tolist(), autojunk=False)
+        for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+            if tag == 'equal':
+                src[j1:j2] = np.arange(i1, i2)
+            else:
+                spans.append((j1, j2))
+    return src, spans
+
+
+def _delta(before, after, changed, rows_before):
+    # fixed / still failing / newly introduced, matched on the QC and its message
+    def key(v):
+        return (v.qc, v.kind, v.line)
+
+    remaining = Counter(map(key, after))
+    fixed, still_failing = [], []
+    for v in before:
+        if remaining[key(v)] > 0:
+            remaining[key(v)] -= 1
+            still_failing.append(v)
+        else:
+            fixed.append(v)
+
+    introduced = []
+    seen = Counter(map(key, before))
+    for v in after:
+        if seen[key(v)] > 0:
+            seen[key(v)] -= 1
+        else:
+            introduced.append(v)
+    return Delta(changed, rows_before, fixed, still_failing, introduced)
+
+
+def process_match(raw, match_id, engine="pandas", history=HISTORY, timings=None):
+    # raw: raid rows with the 122 raw column names. Returns (MatchVersion, Delta or None)
+    # timings: dict that gets the 'transform' and 'qc' seconds added (optional)
+    start = time.perf_counter()
+    fingerprints = fingerprint(raw)
+    previous = history.get(match_id)
+
+    # ------ First upload: full run ------
+    if previous is None:
+        processed = transform(raw, match_id, engine=engine)
+        flags = flag_matrix(raw)
+        start = lap(timings, 'transform', start)
+        teams = raiding_teams(raw)
+        violations = run_qcs(processed, flags, teams=teams)
+        lap(timings, 'qc', start)
+        version = MatchVersion(raw, fingerprints, processed, violations, flags, teams)
+        history.put(match_id, version)
+        return version, None
+
+    # ------ Re-upload: row-level diff ------
+    src, spans = _align(previous.fingerprints, fingerprints)
+    n = len(raw)
+    reused = np.flatnonzero(src >= 0)
+    changed = np.flatnonzero(src < 0)
+
+    parts = [previous.processed.iloc[src[reused]].set_axis(reused)]
+    flags = np.empty((n, previous.flags.shape[1]), dtype=previous.flags.dtype)
+    flags[reused] = previous.flags[src[reused]]
+    teams = raiding_teams(raw)
+    if len(changed):
+        fresh_raw = raw.iloc[changed].reset_index(drop=True)
+        parts.append(transform(fresh_raw, match_id, engine=engine).set_axis(changed))
+        flags[changed] = flag_matrix(fresh_raw)
+    processed = pd.concat(parts).sort_index()
+
+    # Positional columns follow the new row order
+    processed['Match_Raid_Number'] = range(1, n + 1)
+    processed['Video'] = range(1, n + 1)
+    start = lap(timings, 'transform', start)
+
+    # ------ Re-QC: edited rows and their ±2 neighbours ------
+    anchors = set()
+    for j1, j2 in spans:
+        anchors.update(range(max(j1 - WINDOW, 0), min(j2 + WINDOW, n)))
+
+    old_to_new = np.full(len(previous.fingerprints), -1)
+    old_to_new[src[reused]] = reused
+
+    kept = []
+    for v in previous.violations:
+        row = old_to_new[v.row]
+        if row >= 0 and row not in anchors and v.qc not in LINEUP_CHECKS:
+            kept.append(v._replace(row=int(row)))
+
+    local = {c.qc for c in CHECKS} - LINEUP_CHECKS
+    violations = sort_violations(kept + run_qcs(processed, flags, rows=sorted(anchors), qcs=local)
+                                 + run_qcs(processed, flags, qcs=LINEUP_CHECKS, teams=teams))
+    lap(timings, 'qc', start)
+
+    version = MatchVersion(raw, fingerprints, processed, violations, flags, teams)
+    history.put(match_id, version)
+    return version, _delta(previous.violations, violations, len(changed), len(previous.fingerprints))
+
+
+def restore_match(match_id, version, history=HISTORY):
+    # A version loaded from elsewhere (e.g. the on-disk cache) becomes the latest one
+    previous = history.get(match_id)
+    history.put(match_id, version)
+    if previous is None:
+        return None
+    changed = int(np.count_nonzero(~np.isin(version.fingerprints, previous.fingerprints)))
+    return _delta(previous.violations, version.violations, changed, len(previous.fingerprints))
@@ -0,0 +1,172 @@
+# ---------------------------
+# Raw export layout & processed output layout
+# ---------------------------
+# Plain Python only (no pandas / numpy), so every engine and tool can share it.
+
+
+# ------ Match Metadata ------
+
+INITIAL_MATCH_ID = 6464
+TOURNAMENT_ID = "T001"
+SEASON_ID = "S12"
+
+
+# ------ Raw Columns (New Dashboard, 122 columns) ------
+
+RAW_COLUMNS = [
+    'Name','Time','Start','Stop','Team','Player','Raid 1','Raid 2','Raid 3',
+    'D1','D2','D3','D4','D5','D6','D7','Successful','Empty','Unsuccessful',
+    'Bonus','No Bonus','Z1','Z2','Z3','Z4','Z5','Z6','Z7','Z8','Z9','RT0',
+    'RT1','RT2','RT3','RT4','RT5','RT6','RT7','RT8','RT9','DT0','DT1','DT2',
+    'DT3','DT4','Hand touch','Running hand touch','Toe touch','Running Kick',
+    'Reverse Kick','Side Kick','Defender self out','Body hold',
+    'Ankle hold','Single Thigh hold','Push','Dive','DS0','DS1','DS2','DS3','In Turn',
+    'Out Turn','Create Gap','Jump','Dubki','Struggle','Release','Block','Chain_def','Follow',
+    'Technical Point','All Out', *(f'RL{i}' for i in range(1, 31)),
+    'Raider self out','Running Bonus','Centre Bonus','LCorner','LIN','LCover','Center',
+    'RCover','RIN','RCorner','Flying Touch','Double Thigh Hold','Flying Reach','Clean','Not Clean',
+    # Extra 4 columns
+    'Yes','No','Z10','Z11']
+
+# Raw columns that carry text instead of 0/1 flags
+TEXT_COLUMNS = ['Name', 'Time', 'Start', 'Stop', 'Team', 'Player']
+FLAG_COLUMNS = [c for c in RAW_COLUMNS if c not in TEXT_COLUMNS]
+
+
+# ------ Flag Groups ------
+
+# Suffix-weighted groups: flag set → its number, summed into one value
+RAID_COLS = ['Raid 1', 'Raid 2', 'Raid 3']
+DEFENDER_COLS = ['D1', 'D2', 'D3', 'D4', 'D5', 'D6', 'D7']
+RT_COLS = ['RT0', 'RT1', 'RT2', 'RT3', 'RT4', 'RT5', 'RT6', 'RT7', 'RT8', 'RT9']
+DT_COLS = ['DT0', 'DT1', 'DT2', 'DT3', 'DT4']
+DSO_COLS = ['DS0', 'DS1', 'DS2', 'DS3']
+RL_COLS = [f'RL{i}' for i in range(1, 31)]
+
+# Label groups: flag set → its column name, joined into one string
+OUTCOME_COLS = ['Successful', 'Empty', 'Unsuccessful']
+BONUS_COLS = ['Bonus', 'Centre Bonus', 'Running Bonus']
+ZONE_COLS = ['Z1', 'Z2', 'Z3', 'Z4', 'Z5', 'Z6', 'Z7', 'Z8', 'Z9', 'Z10', 'Z11']
+ATT_SKILL_COLS = ['Hand touch', 'Running hand touch', 'Toe touch', 'Running Kick', 'Reverse Kick',
+                  'Side Kick', 'Defender self out', 'Flying Touch']
+DS_SKILL_COLS = ['Body hold', 'Ankle hold', 'Single Thigh hold', 'Double Thigh Hold', 'Push', 'Dive', 'Block',
+                 'Chain_def', 'Follow', 'Raider self out']
+CA_COLS = ['In Turn', 'Out Turn', 'Create Gap', 'Jump', 'Dubki', 'Struggle', 'Release', 'Flying Reach']
+DEF_POS_COLS = ['LCorner', 'LIN', 'LCover', 'Center', 'RCover', 'RIN', 'RCorner']
+QOD_COLS = ['Clean', 'Not Clean']
+TIE_COLS = ['Yes', 'No']
+
+# Output column → (raw flag columns, separator used to join the labels)
+LABEL_GROUPS = {
+    'Outcome': (OUTCOME_COLS, ' '),
+    'Type_of_Bonus': (BONUS_COLS, ' '),
+    'Zone_of_Action': (ZONE_COLS, ' '),
+    'Attacking_Skill': (ATT_SKILL_COLS, ', '),
+    'Defensive_Skill': (DS_SKILL_COLS, ', '),
+    'Counter_Action_Skill': (CA_COLS, ', '),
+    'Defender_Position': (DEF_POS_COLS, ', '),
+    'QoD_Skill': (QOD_COLS, ', '),
+    'Tie_Break_Raids': (TIE_COLS, ', '),
+}
+
+
+# ------ One-hot Cardinality (QC 26) ------
+
+# (min, max) flags set per raid; None: no upper bound
+EXACTLY_ONE, AT_MOST_ONE, ANY = (1, 1), (0, 1), (0, None)
+
+# Group → (raw flag columns, cardinality)
+ONE_HOT_GROUPS = {
+    'Raid': (RAID_COLS, EXACTLY_ONE),
+    'Defenders': (DEFENDER_COLS, EXACTLY_ONE),
+    'Outcome': (OUTCOME_COLS, EXACTLY_ONE),
+    'Bonus': (['Bonus', 'No Bonus'], AT_MOST_ONE),
+    'Zone': (ZONE_COLS, AT_MOST_ONE),
+    'Raiding Team Points': (RT_COLS, EXACTLY_ONE),
+    'Defending Team Points': (DT_COLS, EXACTLY_ONE),
+    'Defenders Self Out': (DSO_COLS, EXACTLY_ONE),
+    'Raid Length': (RL_COLS, AT_MOST_ONE),
+    'QoD': (QOD_COLS, AT_MOST_ONE),
+    'Tie Break': (TIE_COLS, EXACTLY_ONE),
+    'Attacking Skill': (ATT_SKILL_COLS, ANY),
+    'Defensive Skill': (DS_SKILL_COLS, ANY),
+    'Counter Action': (CA_COLS, ANY),
+    'Defender Position': (DEF_POS_COLS, ANY),
+}
+
+
+# ------ Processed Output ------
+
+DEFENDER_NAME_COLS = ['Defender_1_Name', 'Defender_2_Name', 'Defender_3_Name',
+                      'Defender_4_Name', 'Defender_5_Name', 'Defender_6_Name', 'Defender_7_Name']
+NAME_COLS = ['Raider_Name', *DEFENDER_NAME_COLS]
+
+# Columns added empty, to be filled downstream
+NEW_COLUMNS = [
+    # --- Extra Columns ---
+    'Video_Link', 'Video', 'Event', 'YC_Extra', 'Team_ID',                # 5
+
+    # --- TEAM RAID NUMBERING ---
+    'Team_Raid_Number', 'Defender_1', 'Defender_2',
+    'Defender_3', 'Defender_4', 'Defender_5',
+    'Defender_6', 'Defender_7',                                            # 8
+
+    # --- TEAMS & PLAYERS IDENTIFICATION ---
+    'Raiding_Team_ID', 'Raiding_Team_Name',
+    'Defending_Team_ID', 'Defending_Team_Name',
+    'Player_ID', 'Raider_ID',                                              # 6
+
+    # --- POINTS BREAKDOWN ---
+    'Raiding_Team_Points_Pre', 'Defending_Team_Points_Pre',
+    'Raiding_Touch_Points', 'Raiding_Bonus_Points',
+    'Raiding_Self_Out_Points', 'Raiding_All_Out_Points',
+    'Defending_Capture_Points', 'Defending_Bonus_Points',
+    'Defending_Self_Out_Points', 'Defending_All_Out_Points',               # 10
+
+    # --- RAID ACTION DETAILS ---
+    'Number_of_Raiders', 'Raider_Self_Out',
+    'Defenders_Touched_or_Caught', 'Half'                                   # 4
+]
+
+OUTPUT_ORDER = [
+
+    # 1. Raid Details & Identification
+    "Season_ID", "Tournament_ID", "Match_No",
+    "Match_ID", "Event_Number", "Match_Raid_Number",
+    "Team_Raid_Number", "Raid_Number",
+    "Half", "Time", "Raid_Length",                                                               # 11
+
+    # 2. Raid Outcome & Scoring
+    "Outcome", "All_Out", "Bonus", "Type_of_Bonus", "Technical_Point", "Raider_Self_Out",
+    "Raiding_Touch_Points", "Raiding_Bonus_Points",
+    "Raiding_Self_Out_Points", "Raiding_All_Out_Points", "Raiding_Team_Points",
+    "Defending_Capture_Points", "Defending_Bonus_Points",
+    "Defending_Self_Out_Points", "Defending_All_Out_Points", "Defending_Team_Points",
+    "Number_of_Raiders", "Defenders_Touched_or_Caught",
+    "Raiding_Team_Points_Pre", "Defending_Team_Points_Pre", "Zone_of_Action",                     # 21
+
+    # 3. Player & Team Info
+    "Raider_Name", "Player_ID",
+    "Raider_ID", "Raiding_Team_ID",
+    "Raiding_Team_Name", "Defending_Team_ID",
+    "Defending_Team_Name",                                                                          # 7
+
+    # 4. Defenders’ Info
+    "Number_of_Defenders", "Defender_Position",
+    "Defender_1", "Defender_1_Name", "Defender_2", "Defender_2_Name",
+    "Defender_3", "Defender_3_Name", "Defender_4", "Defender_4_Name",
+    "Defender_5", "Defender_5_Name", "Defender_6", "Defender_6_Name",                              # 17
+    "Defender_7", "Defender_7_Name",
+    "Number_of_Defenders_Self_Out",
+
+    # 5. Skills & Actions
+    "Attacking_Skill", "Defensive_Skill", "QoD_Skill",
+    "Counter_Action_Skill", "Tie_Break_Raids",                                                     # 5
+
+    # 6. Video & Event Metadata
+    "Video_Link", "Video", "Event", "YC_Extra", "Team_ID"                                           # 5
+]
+
+
+def match_number(match_id):
+    return int(match_id) - INITIAL_MATCH_ID + 1
@@ -0,0 +1,196 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+from timeline import duration_seconds
+
+
+# ---------------------------
+# Raid_Length vs clock duration (season archive)
+# ---------------------------
+# Raid_Length comes from the RL flags and Time from Stop - Start, so a wrong RL flag gives a
+# length that looks fine on its own but disagrees with the clock. For every raid the
+# deviation Raid_Length - clock seconds is scored against its group (tagger, venue, ...;
+# the season when no group is given) with a robust z-score:
+#
+#   score = 0.6745 * (deviation - group median) / group MAD
+#
+# Groups with fewer than MIN_GROUP raids are scored against their whole season instead.
+# Matches are added one at a time (re-adding replaces them); the medians are recomputed
+# over the whole archive in one grouped pass when scores are asked for.
+#
+#   audit = LengthAudit.load("archive/raid_length.npz")
+#   audit.top(20)          # Season_ID, Group, Match_ID, Event_Number, Raid_Length, Clock, Deviation, Score
+
+MIN_GROUP = 30
+MIN_MAD = 1.0       # seconds; most raids agree exactly, so the MAD alone can be 0
+COLUMNS = ['Season_ID', 'Group', 'Match_ID', 'Event_Number', 'Raid_Length', 'Clock', 'Deviation', 'Score']
+
+
+def clock_seconds(processed):
+    return duration_seconds(processed['Time']).to_numpy(dtype=float)
+
+
+def _robust(values, codes):
+    # Per code: (median, MAD, count) of values, as arrays indexed by code
+    s = pd.Series(values)
+    median = s.groupby(codes).median()
+    mad = (s - median.reindex(codes).to_numpy()).abs().groupby(codes).median()
+    size = s.groupby(codes).size()
+    top = codes.max() + 1 if len(codes) else 0
+    out = [np.full(top, np.nan) for _ in range(3)]
+    for arr, found in zip(out, (median, mad, size)):
+        arr[found.index.to_numpy()] = found.to_numpy()
+    return out
+
+
+class LengthAudit:
+
+    def __init__(self, matches=None, match_seasons=None, match_groups=None, match_codes=None, events=None,
+                 raid_length=None, clock=None):
+        self.matches = [] if matches is None else list(matches)
+        self.match_seasons = [] if match_seasons is None else list(match_seasons)
+        self.match_groups = [] if match_groups is None else list(match_groups)
+        self.match_codes = np.zeros(0, dtype=np.int32) if match_codes is None else match_codes
+        self.events = np.zeros(0, dtype='U1') if events is None else events
+        self.raid_length = np.zeros(0, dtype=np.int16) if raid_length is None else raid_length
+        self.clock = np.zeros(0, dtype=np.float32) if clock is None else clock
+        self._scores = None
+
+    def __len__(self):
+        return len(self.events)
+
+    # ------ Updates ------
+
+    def add_match(self, match_id, season_id, events, raid_length, clock, group=None):
+        # Replaces the raids of match_id if it was added before. group: tagger, venue, ... (default: season)
+        match_id = str(match_id)
+        group = str(season_id) if group is None else str(group)
+        if match_id in self.matches:
+            code = self.matches.index(match_id)
+            self.match_seasons[code], self.match_groups[code] = str(season_id), group
+            self._keep(self.match_codes != code)
+        else:
+            code = len(self.matches)
+            self.matches.append(match_id)
+            self.match_seasons.append(str(season_id))
+            self.match_groups.append(group)
+
+        events = np.asarray(events, dtype=str)
+        self.match_codes = np.concatenate([self.match_codes, np.full(len(events), code, dtype=np.int32)])
+        self.events = np.concatenate([self.events, events])
+        self.raid_length = np.concatenate([self.raid_length, np.asarray(raid_length, dtype=np.int16)])
+        self.clock = np.concatenate([self.clock, np.asarray(clock, dtype=np.float32)])
+        self._scores = None
+
+    def remove_match(self, match_id):
+        match_id = str(match_id)
+        if match_id in self.matches:
+            self._keep(self.match_codes != self.matches.index(match_id))
+
+    def _keep(self, keep):
+        self.match_codes, self.events = self.match_codes[keep], self.events[keep]
+        self.raid_length, self.clock = self.raid_length[keep], self.clock[keep]
+        self._scores = None
+
+    # ------ Scores ------
+
+    def scores(self):
+        # Robust z-score of every raid (NaN where the clock duration is unknown)
+        if self._scores is not None:
+            return self._scores
+        deviation = self.raid_length.astype(float) - self.clock
+        known = ~np.isnan(deviation)
+
+        _, season_codes = np.unique(np.asarray(self.match_seasons, dtype=str), return_inverse=True)
+        group_keys = [f"{s}\x00{g}" for s, g in zip(self.match_seasons, self.match_groups)]
+        _, group_codes = np.unique(np.asarray(group_keys, dtype=str), return_inverse=True)
+        raid_season = season_codes.reshape(-1)[self.match_codes][known]
+        raid_group = group_codes.reshape(-1)[self.match_codes][known]
+
+        values = deviation[known]
+        s_med, s_mad, _ = _robust(values, raid_season)
+        g_med, g_mad, g_size = _robust(values, raid_group)
+        small = g_size[raid_group] < MIN_GROUP
+        median = np.where(small, s_med[raid_season], g_med[raid_group])
+        mad = np.where(small, s_mad[raid_season], g_mad[raid_group])
+
+        score = np.full(len(deviation), np.nan)
+        score[known] = 0.6745 * (values - median) / np.maximum(mad, MIN_MAD)
+        self._scores = score
+        return score
+
+    def frame(self, rows):
+        codes = self.match_codes[rows]
+        deviation = self.raid_length[rows].astype(float) - self.clock[rows]
+        return pd.DataFrame({
+            'Season_ID': np.asarray(self.match_seasons, dtype=str)[codes] if len(rows) else [],
+            'Group': np.asarray(self.match_groups, dtype=str)[codes] if len(rows) else [],
+            'Match_ID': np.asarray(self.matches, dtype=str)[codes] if len(rows) else [],
+            'Event_Number': self.events[rows],
+            'Raid_Length': self.raid_length[rows],
+            'Clock': self.clock[rows],
+            'Deviation': deviation,
+            'Score': self.scores()[rows].round(2),
+        }, columns=COLUMNS)
+
+    def top(self, k=20, season=None):
+        # The k raids whose length disagrees most with their clock, relative to their group
+        strength = np.abs(self.scores())
+        strength = np.where(np.isnan(strength), -1.0, strength)
+        if season is not None:
+            in_season = np.asarray(self.match_seasons, dtype=str)[self.match_codes] == str(season)
+            strength = np.where(in_season, strength, -1.0)
+        k = min(k, int(np.count_nonzero(strength >= 0)))
+        if k <= 0:
+            return self.frame(np.zeros(0, dtype=np.int64))
+        rows = np.argpartition(-strength, k - 1)[:k]
+        rows = rows[np.lexsort((rows, -strength[rows]))]
+        return self.frame(rows)
+
+    # ------ Persistence ------
+
+    def save(self, path):
+        folder = os.path.dirname(path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        tmp = path + '.tmp.npz'
+        np.savez(tmp, matches=np.asarray(self.matches, dtype=str),
+                 match_seasons=np.asarray(self.match_seasons, dtype=str),
+                 match_groups=np.asarray(self.match_groups, dtype=str), match_codes=self.match_codes,
+                 events=self.events, raid_length=self.raid_length, clock=self.clock)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path):
+        if not os.path.exists(path):
+            return cls()
+        with np.load(path) as data:
+            return cls(data['matches'].tolist(), data['match_seasons'].tolist(), data['match_groups'].tolist(),
+                       data['match_codes'], data['events'], data['raid_length'], data['clock'])
+
+
+def update_length_audit(path, version, group=None):
+    # version: incremental.MatchVersion of one processed match
+    processed = version.processed
+    audit = LengthAudit.load(path)
+    audit.add_match(processed['Match_ID'].iloc[0], processed['Season_ID'].iloc[0], processed['Event_Number'],
+                    pd.to_numeric(processed['Raid_Length'], errors='coerce').fillna(0), clock_seconds(processed),
+                    group)
+    audit.save(path)
+    return audit
+
+
+# python length_audit.py archive/raid_length.npz -k 20 [--season S12]
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description="List the raids whose Raid_Length disagrees most with Stop - Start.")
+    parser.add_argument('audit')
+    parser.add_argument('-k', type=int, default=20)
+    parser.add_argument('--season')
+    args = parser.parse_args()
+
+    LengthAudit.load(args.audit).top(args.k, args.season).to_csv(sys.stdout, index=False)
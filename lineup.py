@@ -0,0 +1,106 @@
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+
+# ---------------------------
+# On-court lineup tracker (QC 27-29)
+# ---------------------------
+# One pass over a match's raids in Match_Raid_Number order, with the raiding team of every
+# raid (incremental.raiding_teams). Both sides start with 7 on court:
+#
+#   - defenders touched or self out (Raiding_Touch_Points + Raiding_Self_Out_Points) leave
+#     the court, and the raiding side revives as many of its own players
+#   - a raider caught or self out (Defending_Capture_Points + Defending_Self_Out_Points)
+#     leaves the court, and the defending side revives one
+#   - a side left with nobody is all out: the other side scores 2 and all 7 come back
+#
+# The defending side is set to the tagged Number_of_Defenders after each raid is compared,
+# so one tagging mistake is reported once instead of on every raid after it.
+# Tie-break raids and raids without a known team are not tracked.
+
+COURT = 7
+
+# Per raid; untracked raids hold -1 / False
+Lineup = namedtuple('Lineup', ['tracked', 'raiding_team', 'defending_team', 'defenders', 'raiders_left',
+                               'defenders_left', 'all_out', 'raiding_all_out_points', 'defending_all_out_points'])
+
+LINEUP_COLS = ['Number_of_Defenders', 'All_Out', 'Tie_Break_Raids',
+               'Raiding_Touch_Points', 'Raiding_Self_Out_Points', 'Defending_Capture_Points',
+               'Defending_Self_Out_Points', 'Raiding_All_Out_Points', 'Defending_All_Out_Points']
+
+
+def _ints(df, col):
+    return pd.to_numeric(df[col], errors='coerce').fillna(0).astype(int).tolist()
+
+
+def track(df, teams):
+    # df: transformed frame of one match (RangeIndex, raid order). teams: raiding team per raid
+    n = len(df)
+    tagged = _ints(df, 'Number_of_Defenders')
+    defenders_out = [a + b for a, b in zip(_ints(df, 'Raiding_Touch_Points'), _ints(df, 'Raiding_Self_Out_Points'))]
+    raider_out = [min(a + b, 1) for a, b in zip(_ints(df, 'Defending_Capture_Points'),
+                                                 _ints(df, 'Defending_Self_Out_Points'))]
+    tie_break = (df['Tie_Break_Raids'].fillna('').astype(str).str.strip() == 'Yes').tolist()
+    teams = ['' if t is None else str(t).strip() for t in teams]
+
+    tracked = np.zeros(n, dtype=bool)
+    raiding_team, defending_team = np.full(n, '', dtype=object), np.full(n, '', dtype=object)
+    defenders, raiders_left, defenders_left = (np.full(n, -1) for _ in range(3))
+    all_out = np.zeros(n, dtype=bool)
+    raiding_points, defending_points = np.zeros(n, dtype=int), np.zeros(n, dtype=int)
+
+    sides = list(dict.fromkeys(t for t in teams if t))[:2]     # the two teams, in order of their first raid
+    on_court = dict.fromkeys(sides, COURT)
+    for i in range(n):
+        raiding = teams[i]
+        if tie_break[i] or len(sides) < 2 or raiding not in sides:
+            continue
+        defending = sides[1 - sides.index(raiding)]
+
+        tracked[i] = True
+        raiding_team[i], defending_team[i] = raiding, defending
+        defenders[i] = on_court[defending]
+        if 1 <= tagged[i] <= COURT:
+            on_court[defending] = tagged[i]
+
+        # Outs, then one revival per opponent put out
+        put_out = min(defenders_out[i], on_court[defending])
+        caught = min(raider_out[i], on_court[raiding])
+        on_court[defending] = min(on_court[defending] - put_out + caught, COURT)
+        on_court[raiding] = min(on_court[raiding] - caught + put_out, COURT)
+        raiders_left[i], defenders_left[i] = on_court[raiding], on_court[defending]
+
+        if on_court[defending] == 0:
+            raiding_points[i] = 2
+            on_court[defending] = COURT
+        if on_court[raiding] == 0:
+            defending_points[i] = 2
+            on_court[raiding] = COURT
+        all_out[i] = raiding_points[i] > 0 or defending_points[i] > 0
+
+    return Lineup(tracked, raiding_team, defending_team, defenders, raiders_left, defenders_left, all_out,
+                  raiding_points, defending_points)
+
+
+# python lineup.py export.csv   (players on court raid by raid)
+if __name__ == '__main__':
+    import argparse
+    import sys
+    from incremental import raiding_teams
+    from pipeline import extract_raids, read_raw, transform
+
+    parser = argparse.ArgumentParser(description="Print the players on court raid by raid.")
+    parser.add_argument('export')
+    args = parser.parse_args()
+
+    raw = extract_raids(read_raw(args.export))
+    processed = transform(raw, 0)
+    lineup = track(processed, raiding_teams(raw))
+    pd.DataFrame({
+        'Event_Number': processed['Event_Number'], 'Raiding_Team': lineup.raiding_team,
+        'Defending_Team': lineup.defending_team, 'Expected_Defenders': lineup.defenders,
+        'Number_of_Defenders': processed['Number_of_Defenders'], 'Raiders_Left': lineup.raiders_left,
+        'Defenders_Left': lineup.defenders_left, 'All_Out': lineup.all_out.astype(int),
+    })[lineup.tracked].to_csv(sys.stdout, index=False)
@@ -0,0 +1,289 @@
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import numpy as np
+
+from layout import (RAW_COLUMNS, TEXT_COLUMNS, RAID_COLS, DEFENDER_COLS, OUTCOME_COLS, ZONE_COLS, RT_COLS,
+                    DT_COLS, DSO_COLS, RL_COLS, ATT_SKILL_COLS, DS_SKILL_COLS, CA_COLS, DEF_POS_COLS,
+                    QOD_COLS, TIE_COLS)
+
+
+# ---------------------------
+# Concurrent-session load test
+# ---------------------------
+# python loadtest.py --sessions 1 2 4 8 --rounds 3 --raids 200 -o loadtest.json [--compare old.json]
+#
+# Every session uploads a synthetic 122-column export, changes the Match ID and clicks
+# "Process CSV", once per round; only the click is timed. By default sessions are threads
+# running the page's processing path in this process, which plays the server (one
+# process, one thread per session, shared cache and history), and RSS is sampled here.
+# With --apptest each session is a headless Streamlit AppTest of combined_app.py instead.
+# With --same-export every session opens the same exports, like several people on one match.
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+APP = os.path.join(HERE, 'combined_app.py')
+TIMEOUT = 600
+FIRST_MATCH_ID = 9000
+
+PLAYERS = ["7-Rahul Chaudhari", "3-Pawan Sehrawat", "11-Maninder Singh", "5-Fazel Atrachali",
+           "1-Sunil Kumar", "9-Arjun Deshwal", "4-Naveen Kumar", "6-Surjeet Singh"]
+
+
+# ------ Synthetic Exports ------
+
+def synthetic_export(raids=200, seed=0):
+    # A raw export in the real layout: preamble, Name header, one-hot flag groups per raid
+    r = random.Random(seed)
+    pad = ';' * (len(RAW_COLUMNS) - 2)
+    lines = [f"Export;synthetic{pad}", f"Match;Team A vs Team B ({seed}){pad}", f"Half 1;{pad}", ";".join(RAW_COLUMNS)]
+    clock = 0
+    for i in range(1, raids + 1):
+        row = dict.fromkeys(RAW_COLUMNS, '')
+        row.update(dict.fromkeys((c for c in RAW_COLUMNS if c not in TEXT_COLUMNS), '0'))
+
+        start = clock + r.randint(5, 40)
+        clock = start + r.randint(5, 30)
+        row['Name'] = f"Raid {i}"
+        row['Time'] = '00:30'
+        row['Start'] = f"{start // 60:02}:{start % 60:02},{r.randint(0, 999):03}"
+        row['Stop'] = f"{clock // 60:02}:{clock % 60:02},{r.randint(0, 999):03}"
+        row['Team'] = r.choice(['Team A', 'Team B'])
+        row['Player'] = ' | '.join(r.sample(PLAYERS, r.randint(1, 4)))
+
+        outcome = r.choice(OUTCOME_COLS)
+        for group in (RAID_COLS, DEFENDER_COLS, ZONE_COLS, RT_COLS, DT_COLS, DSO_COLS, TIE_COLS):
+            row[r.choice(group)] = '1'
+        row[outcome] = '1'
+        row[r.choice(RL_COLS)] = '1'
+        if outcome != 'Empty':
+            for group in (ATT_SKILL_COLS, DS_SKILL_COLS, CA_COLS, DEF_POS_COLS, QOD_COLS):
+                if r.random() < .6:
+                    row[r.choice(group)] = '1'
+        if r.random() < .3:
+            row[r.choice(['Bonus', 'Centre Bonus', 'Running Bonus'])] = '1'
+        else:
+            row['No Bonus'] = '1'
+        lines.append(";".join(row[c] for c in RAW_COLUMNS))
+    return ("\n".join(lines) + "\n").encode('utf-8')
+
+
+# ------ Measurements ------
+
+def rss_mb():
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return peak_rss_mb()
+
+
+def peak_rss_mb():
+    import resource
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+class RssSampler(threading.Thread):
+
+    def __init__(self, interval=0.05):
+        super().__init__(daemon=True)
+        self.interval = interval
+        self.peak = rss_mb()
+        self._done = threading.Event()
+
+    def run(self):
+        while not self._done.wait(self.interval):
+            self.peak = max(self.peak, rss_mb())
+
+    def stop(self):
+        self._done.set()
+        self.join()
+        return max(self.peak, rss_mb())
+
+
+# ------ Sessions ------
+
+def headless_session(first_id, rounds, raids, engine):
+    # What the page runs for one tagger, without the UI: read the upload into the shared
+    # frame store, then on "Process CSV" process it and build the download. Like an open tab,
+    # the session holds its store handles until it ends. Returns (latencies in seconds, failed rounds)
+    import io
+    from frame_store import STORE, processed_key, raw_key
+    from pipeline import PipelineError, read_raw
+    from processing import process_upload
+
+    latencies, failed, held = [], 0, []
+    for match_id in range(first_id, first_id + rounds):
+        content = synthetic_export(raids, seed=match_id)
+        for ref in held:
+            ref.release()
+        held = [STORE.acquire(raw_key(content), lambda: read_raw(io.BytesIO(content)))]
+
+        start = time.perf_counter()
+        try:
+            result = process_upload(content, match_id, engine=engine, raw_df=held[0].frame())
+            held.append(STORE.acquire(processed_key(content, match_id), lambda: result.processed))
+            result.processed.to_csv(index=False).encode('utf-8')
+        except PipelineError:
+            failed += 1
+        latencies.append(time.perf_counter() - start)
+    for ref in held:
+        ref.release()
+    return latencies, failed
+
+
+def apptest_session(first_id, rounds, raids, engine):
+    # The whole page in a headless Streamlit AppTest. AppTest keeps one runtime per process,
+    # so every session runs in its own process. Returns (latencies, failed rounds, peak RSS MB)
+    from streamlit.testing.v1 import AppTest
+    import streamlit.logger
+    streamlit.logger.set_log_level('error')
+
+    at = AppTest.from_file(APP, default_timeout=TIMEOUT)
+    at.run()
+    if engine != 'pandas':
+        at.selectbox[0].set_value(engine)
+
+    latencies, failed = [], 0
+    for match_id in range(first_id, first_id + rounds):
+        at.text_input[0].set_value(str(match_id))
+        at.file_uploader[0].set_value((f"export_{match_id}.csv", synthetic_export(raids, seed=match_id), "text/csv"))
+        at.run()
+
+        start = time.perf_counter()
+        at.button[0].click().run()
+        latencies.append(time.perf_counter() - start)
+
+        if len(at.exception) or len(at.error) or not at.get('download_button'):
+            failed += 1
+    return latencies, failed, peak_rss_mb()
+
+
+def run_level(sessions, rounds, raids, engine, apptest=False, first_id=FIRST_MATCH_ID, same_export=False):
+    # Every upload gets its own Match ID and contents, so nothing is served from the cache,
+    # unless same_export: then all sessions open the same exports
+    ids = [first_id if same_export else first_id + k * rounds for k in range(sessions)]
+    sampler = RssSampler()
+    sampler.start()
+    start = time.perf_counter()
+    if apptest:
+        with ProcessPoolExecutor(max_workers=sessions) as pool:
+            jobs = [pool.submit(apptest_session, i, rounds, raids, engine) for i in ids]
+            results = [job.result() for job in jobs]
+    else:
+        with ThreadPoolExecutor(max_workers=sessions) as pool:
+            results = list(pool.map(lambda i: headless_session(i, rounds, raids, engine), ids))
+    wall = time.perf_counter() - start
+    peak = sampler.stop()
+    if apptest:
+        # Sessions are separate processes: count their memory together
+        peak = sum(r[2] for r in results)
+
+    latencies = np.array([t for r in results for t in r[0]])
+    return {
+        'sessions': sessions,
+        'requests': len(latencies),
+        'failed': sum(r[1] for r in results),
+        'p50_s': round(float(np.percentile(latencies, 50)), 3),
+        'p95_s': round(float(np.percentile(latencies, 95)), 3),
+        'p99_s': round(float(np.percentile(latencies, 99)), 3),
+        'mean_s': round(float(latencies.mean()), 3),
+        'throughput_rps': round(len(latencies) / wall, 3),
+        'rss_peak_mb': round(peak, 1),
+    }
+
+
+# ------ Report ------
+
+COLUMNS = ['sessions', 'requests', 'failed', 'p50_s', 'p95_s', 'p99_s', 'mean_s', 'throughput_rps', 'rss_peak_mb']
+
+
+def _commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=HERE, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def table(report, previous=None):
+    # Markdown table; with a previous report, each value is followed by its change
+    before = {level['sessions']: level for level in (previous or {}).get('levels', [])}
+    lines = ['| ' + ' | '.join(COLUMNS) + ' |', '|' + '---|' * len(COLUMNS)]
+    for level in report['levels']:
+        old = before.get(level['sessions'])
+        cells = []
+        for col in COLUMNS:
+            cell = str(level[col])
+            if old is not None and col not in ('sessions', 'requests') and old.get(col):
+                cell += f" ({(level[col] - old[col]) / old[col]:+.0%})"
+            cells.append(cell)
+        lines.append('| ' + ' | '.join(cells) + ' |')
+    return '\n'.join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load test the Process CSV path with concurrent sessions.")
+    parser.add_argument('--sessions', type=int, nargs='+', default=[1, 2, 4, 8], help="concurrency levels")
+    parser.add_argument('--rounds', type=int, default=3, help="uploads per session")
+    parser.add_argument('--raids', type=int, default=200, help="raids per synthetic export")
+    parser.add_argument('--engine', default='pandas')
+    parser.add_argument('--use-cache', action='store_true', help="keep the normal on-disk cache")
+    parser.add_argument('--apptest', action='store_true', help="drive the full page with Streamlit AppTest")
+    parser.add_argument('--same-export', action='store_true', help="every session opens the same exports")
+    parser.add_argument('-o', '--out', default='loadtest.json')
+    parser.add_argument('--compare', metavar='JSON', help="earlier report to compare against")
+    args = parser.parse_args(argv)
+
+    # Fresh cache per run so every upload is really processed (set before the app imports cache.py)
+    if not args.use_cache:
+        os.environ['PKL_CACHE_DIR'] = tempfile.mkdtemp(prefix='pkl-loadtest-')
+
+    report = {
+        'meta': {
+            'date': time.strftime('%Y-%m-%d %H:%M:%S'),
+            'commit': _commit(),
+            'python': platform.python_version(),
+            'cpus': os.cpu_count(),
+            'engine': args.engine,
+            'raids': args.raids,
+            'rounds': args.rounds,
+            'mode': 'apptest' if args.apptest else 'headless',
+            'same_export': args.same_export,
+        },
+        'levels': [],
+    }
+    # Pay the imports and first-call costs before anything is timed
+    headless_session(FIRST_MATCH_ID - 1, 1, args.raids, args.engine)
+    first_id = FIRST_MATCH_ID
+    for n in args.sessions:
+        level = run_level(n, args.rounds, args.raids, args.engine, args.apptest, first_id, args.same_export)
+        first_id += n * args.rounds
+        report['levels'].append(level)
+        print(f"{n} sessions: p50 {level['p50_s']}s, p95 {level['p95_s']}s, "
+              f"{level['throughput_rps']} req/s, RSS {level['rss_peak_mb']} MB", file=sys.stderr)
+
+    with open(args.out, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+
+    previous = None
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            previous = json.load(f)
+    print(table(report, previous))
+    return 1 if any(level['failed'] for level in report['levels']) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
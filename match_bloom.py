@@ -0,0 +1,291 @@
+import glob
+import hashlib
+import os
+import re
+import sys
+import unicodedata
+
+import numpy as np
+import pandas as pd
+
+from layout import DEFENDER_NAME_COLS
+
+
+# ---------------------------
+# Per-match Bloom filters over the processed archive
+# ---------------------------
+# Each processed match gets a sidecar (tagged_1_6464.bloom.npz next to tagged_1_6464.csv)
+# holding a Bloom filter of the tokens found in it: normalised player names (as raider, as
+# defender, either) and Outcome, zone and skill values. A season manifest (S12_bloom.npz)
+# holds every sidecar's filter in one array, so a lookup tests all matches at once and then
+# opens only the candidate files to confirm the raids.
+#
+#   bloom = ArchiveBloom.load("processed/")                  # every *_bloom.npz manifest
+#   bloom.candidates([player_token("Pawan Sehrawat")])       # files that may have it
+#   bloom.find([player_token("Pawan Sehrawat", "raider"), token("zone", "Z3")])
+#
+# A Bloom filter never misses a token; with BITS and HASHES below, a match of ~150 distinct
+# tokens reports a token it does not have about once in 30,000 lookups.
+
+BITS = 4096
+HASHES = 7
+WORDS = BITS // 64
+
+SKILL_COLS = ['Attacking_Skill', 'Defensive_Skill', 'Counter_Action_Skill']
+READ_COLS = ['Season_ID', 'Match_ID', 'Event_Number', 'Raider_Name', *DEFENDER_NAME_COLS, 'Outcome',
+             'Zone_of_Action', *SKILL_COLS]
+ROLES = ('raider', 'defender')
+
+
+def normalize(value):
+    # Case, accents, punctuation and spacing don't matter: "K. Pawan  Sehrawat" = "k pawan sehrawat"
+    value = unicodedata.normalize('NFKD', str(value)).encode('ascii', 'ignore').decode()
+    return ' '.join(re.sub(r'[^\w\s]', ' ', value).casefold().split())
+
+
+def token(kind, value):
+    return f"{kind}:{normalize(value)}"
+
+
+def player_token(name, role=None):
+    # role: 'raider', 'defender' or None (either)
+    if role is not None and role not in ROLES:
+        raise ValueError(f"Unknown role '{role}', expected one of {ROLES}")
+    return token(role or 'player', name)
+
+
+def _present(value):
+    return isinstance(value, str) and value.strip() != ''
+
+
+def raid_tokens(processed):
+    # One set of tokens per raid
+    out = [set() for _ in range(len(processed))]
+
+    def add(col, kind, sep=None):
+        for tokens, value in zip(out, processed[col].to_numpy(dtype=object)):
+            if _present(value):
+                for part in (value.split(sep) if sep else [value]):
+                    if part.strip():
+                        tokens.add(token(kind, part))
+
+    for col in ['Raider_Name', *DEFENDER_NAME_COLS]:
+        role = 'raider' if col == 'Raider_Name' else 'defender'
+        add(col, role)
+        add(col, 'player')
+    add('Outcome', 'outcome', ' ')
+    add('Zone_of_Action', 'zone', ' ')
+    for col in SKILL_COLS:
+        add(col, 'skill', ',')
+    return out
+
+
+# ------ Filter bits ------
+
+def positions(tok):
+    # HASHES bit positions of a token (double hashing over one 128-bit digest; same in every process)
+    digest = hashlib.blake2b(tok.encode('utf-8'), digest_size=16).digest()
+    h1, h2 = int.from_bytes(digest[:8], 'little'), int.from_bytes(digest[8:], 'little') | 1
+    return np.array([(h1 + i * h2) % BITS for i in range(HASHES)], dtype=np.int64)
+
+
+def bloom_bits(tokens):
+    bits = np.zeros(WORDS, dtype=np.uint64)
+    for tok in tokens:
+        pos = positions(tok)
+        np.bitwise_or.at(bits, pos // 64, np.uint64(1) << (pos % 64).astype(np.uint64))
+    return bits
+
+
+def _probe(tokens):
+    # (words, masks) a filter must have all set to possibly hold every token
+    pos = np.concatenate([positions(t) for t in tokens])
+    words = pos // 64
+    masks = np.zeros(WORDS, dtype=np.uint64)
+    np.bitwise_or.at(masks, words, np.uint64(1) << (pos % 64).astype(np.uint64))
+    used = np.unique(words)
+    return used, masks[used]
+
+
+# ------ Sidecars ------
+
+def sidecar_path(csv_path):
+    return csv_path[:-len('.csv')] + '.bloom.npz' if csv_path.endswith('.csv') else csv_path + '.bloom.npz'
+
+
+def write_sidecar(csv_path, processed):
+    # processed: the frame saved to csv_path. Returns (Season_ID, Match_ID, bits)
+    season_id, match_id = str(processed['Season_ID'].iloc[0]), str(processed['Match_ID'].iloc[0])
+    tokens = set().union(*raid_tokens(processed)) if len(processed) else set()
+    bits = bloom_bits(tokens)
+    path = sidecar_path(csv_path)
+    tmp = path + '.tmp.npz'
+    np.savez(tmp, bits=bits, season_id=season_id, match_id=match_id, csv=os.path.basename(csv_path),
+             tokens=len(tokens), size=np.array([BITS, HASHES]))
+    os.replace(tmp, path)
+    return season_id, match_id, bits
+
+
+def read_sidecar(path):
+    with np.load(path) as data:
+        if data['size'].tolist() != [BITS, HASHES]:
+            raise ValueError(f"{path} was built with another filter size; rebuild it")
+        return str(data['season_id']), str(data['match_id']), str(data['csv']), data['bits']
+
+
+# ------ Season manifest ------
+
+class SeasonManifest:
+    # Every match filter of one season: bits is matches x WORDS
+
+    def __init__(self, season_id, match_ids=None, files=None, bits=None):
+        self.season_id = str(season_id)
+        self.match_ids = [] if match_ids is None else list(match_ids)
+        self.files = [] if files is None else list(files)
+        self.bits = np.zeros((0, WORDS), dtype=np.uint64) if bits is None else bits
+
+    def __len__(self):
+        return len(self.match_ids)
+
+    def add(self, match_id, file, bits):
+        # Replaces the filter of match_id if it was added before
+        match_id = str(match_id)
+        if match_id in self.match_ids:
+            i = self.match_ids.index(match_id)
+            self.files[i] = file
+            self.bits[i] = bits
+        else:
+            self.match_ids.append(match_id)
+            self.files.append(file)
+            self.bits = np.concatenate([self.bits, bits[None]])
+
+    def mask(self, tokens):
+        # Matches whose filter may hold every token
+        words, masks = _probe(tokens)
+        return ((self.bits[:, words] & masks) == masks).all(axis=1)
+
+    def save(self, path):
+        folder = os.path.dirname(path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        tmp = path + '.tmp.npz'
+        np.savez(tmp, season_id=self.season_id, match_ids=np.asarray(self.match_ids, dtype=str),
+                 files=np.asarray(self.files, dtype=str), bits=self.bits, size=np.array([BITS, HASHES]))
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path, season_id=None):
+        if not os.path.exists(path):
+            return cls(season_id)
+        with np.load(path) as data:
+            if data['size'].tolist() != [BITS, HASHES]:
+                raise ValueError(f"{path} was built with another filter size; rebuild it")
+            return cls(str(data['season_id']), data['match_ids'].tolist(), data['files'].tolist(), data['bits'])
+
+
+def manifest_path(folder, season_id):
+    return os.path.join(folder, f"{season_id}_bloom.npz")
+
+
+def update_bloom(csv_path, processed):
+    # Sidecar next to csv_path and its entry in the season manifest of the same folder
+    season_id, match_id, bits = write_sidecar(csv_path, processed)
+    path = manifest_path(os.path.dirname(csv_path), season_id)
+    manifest = SeasonManifest.load(path, season_id)
+    manifest.add(match_id, os.path.basename(csv_path), bits)
+    manifest.save(path)
+    return manifest
+
+
+def build_archive(folder):
+    # Manifests for every processed CSV in folder. A CSV is only read when its sidecar is
+    # missing or older than it
+    manifests = {}
+    for csv_path in sorted(glob.glob(os.path.join(folder, 'tagged_*.csv'))):
+        path = sidecar_path(csv_path)
+        if os.path.exists(path) and os.path.getmtime(path) >= os.path.getmtime(csv_path):
+            try:
+                season_id, match_id, _, bits = read_sidecar(path)
+            except ValueError:
+                season_id = None
+        else:
+            season_id = None
+        if season_id is None:
+            processed = pd.read_csv(csv_path, usecols=lambda c: c in READ_COLS, dtype=str)
+            if processed.empty:
+                continue
+            season_id, match_id, bits = write_sidecar(csv_path, processed)
+        manifest = manifests.setdefault(season_id, SeasonManifest(season_id))
+        manifest.add(match_id, os.path.basename(csv_path), bits)
+    for season_id, manifest in manifests.items():
+        manifest.save(manifest_path(folder, season_id))
+    return manifests
+
+
+# ------ Archive lookups ------
+
+class ArchiveBloom:
+
+    def __init__(self, folder, manifests):
+        self.folder = folder
+        self.manifests = manifests
+
+    @classmethod
+    def load(cls, folder):
+        paths = sorted(glob.glob(os.path.join(folder, '*_bloom.npz')))
+        return cls(folder, [SeasonManifest.load(p) for p in paths])
+
+    def candidates(self, tokens, seasons=None):
+        # (Season_ID, Match_ID, file) of the matches that may hold every token
+        found = []
+        for manifest in self.manifests:
+            if seasons is not None and manifest.season_id not in seasons:
+                continue
+            for i in np.flatnonzero(manifest.mask(tokens)):
+                found.append((manifest.season_id, manifest.match_ids[i], manifest.files[i]))
+        return found
+
+    def find(self, tokens, seasons=None):
+        # Raids holding every token, reading only the candidate files
+        tokens = list(tokens)
+        frames = []
+        for _, _, file in self.candidates(tokens, seasons):
+            processed = pd.read_csv(os.path.join(self.folder, file), usecols=lambda c: c in READ_COLS, dtype=str)
+            hit = [set(tokens) <= raid for raid in raid_tokens(processed)]
+            frames.append(processed.loc[hit, ['Season_ID', 'Match_ID', 'Event_Number']])
+        if not frames:
+            return pd.DataFrame(columns=['Season_ID', 'Match_ID', 'Event_Number'])
+        return pd.concat(frames, ignore_index=True)
+
+
+# python match_bloom.py processed/ --build
+# python match_bloom.py processed/ "Pawan Sehrawat" [--role raider] [--zone Z3] [--skill "Ankle hold"]
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Find the raids of a player across processed matches.")
+    parser.add_argument('folder', help="folder of processed tagged_*.csv files")
+    parser.add_argument('player', nargs='?')
+    parser.add_argument('--build', action='store_true', help="(re)write the sidecars and season manifests")
+    parser.add_argument('--role', choices=ROLES, help="only raids where the player had this role")
+    parser.add_argument('--outcome')
+    parser.add_argument('--zone')
+    parser.add_argument('--skill', action='append', default=[])
+    parser.add_argument('--season', action='append', help="only these Season_IDs")
+    parser.add_argument('--matches', action='store_true', help="list candidate files only, without reading them")
+    args = parser.parse_args()
+
+    if args.build:
+        for season_id, manifest in build_archive(args.folder).items():
+            print(f"{season_id}: {len(manifest)} matches → {manifest_path(args.folder, season_id)}")
+    if args.player or args.outcome or args.zone or args.skill:
+        query = [player_token(args.player, args.role)] if args.player else []
+        query += [token('outcome', args.outcome)] if args.outcome else []
+        query += [token('zone', args.zone)] if args.zone else []
+        query += [token('skill', s) for s in args.skill]
+        bloom = ArchiveBloom.load(args.folder)
+        if args.matches:
+            pd.DataFrame(bloom.candidates(query, args.season), columns=['Season_ID', 'Match_ID', 'File']).to_csv(
+                sys.stdout, index=False)
+        else:
+            bloom.find(query, args.season).to_csv(sys.stdout, index=False)
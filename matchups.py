@@ -0,0 +1,245 @@
+import os
+import sys
+import threading
+
+import numpy as np
+import pandas as pd
+
+from layout import DEFENDER_NAME_COLS
+
+
+# ---------------------------
+# Raider x defender matchup matrix (sparse)
+# ---------------------------
+# Players get integer IDs in order of appearance. Every (raider, defender) pair that met in
+# a raid is one non-zero cell holding the counts below, so the matrix is stored in COO form
+# and handed out as CSR. Like the player cube, each match adds its own contribution and
+# re-processing a match subtracts its old one first.
+#
+#   matchups = MatchupMatrix.load("archive/matchups.npz")
+#   matchups.pair("Pawan Sehrawat", "Fazel Atrachali")     # one pair's counts
+#   matchups.raider("Pawan Sehrawat")                      # every defender they met
+#   indptr, indices, data = matchups.csr('touches')
+#
+#   encounters     : raids where the defender is named in the raider's raid
+#   touches        : ... that were Successful (the defender was touched out)
+#   captures       : ... that were Unsuccessful with a capture point (the defender was in the tackle)
+#   raid_points    : Raiding_Team_Points of those raids
+#   defence_points : Defending_Team_Points of those raids
+
+METRICS = ['encounters', 'touches', 'captures', 'raid_points', 'defence_points']
+METRIC = {m: i for i, m in enumerate(METRICS)}
+
+
+def _points(processed, col):
+    return pd.to_numeric(processed[col], errors='coerce').fillna(0).to_numpy(np.int64)
+
+
+def _named(values):
+    return np.array([isinstance(v, str) and v != '' for v in values], dtype=bool)
+
+
+def contribution(processed):
+    # → (raider names, defender names, values): one row per raid and named defender
+    outcome = processed['Outcome'].to_numpy(dtype=object)
+    successful = outcome == 'Successful'
+    captured = (outcome == 'Unsuccessful') & (_points(processed, 'Defending_Capture_Points') > 0)
+
+    per_raid = np.zeros((len(processed), len(METRICS)), dtype=np.int64)
+    per_raid[:, METRIC['encounters']] = 1
+    per_raid[:, METRIC['touches']] = successful
+    per_raid[:, METRIC['captures']] = captured
+    per_raid[:, METRIC['raid_points']] = _points(processed, 'Raiding_Team_Points')
+    per_raid[:, METRIC['defence_points']] = _points(processed, 'Defending_Team_Points')
+
+    raiders = processed['Raider_Name'].to_numpy(dtype=object)
+    has_raider = _named(raiders)
+    names, values = [], []
+    for col in DEFENDER_NAME_COLS:
+        defenders = processed[col].to_numpy(dtype=object)
+        ok = has_raider & _named(defenders)
+        names += zip(raiders[ok], defenders[ok])
+        values.append(per_raid[ok])
+    return names, np.concatenate(values)
+
+
+class MatchupMatrix:
+
+    def __init__(self):
+        self.players = []                               # player ID → name
+        self.cells = []                                 # cell → (raider ID, defender ID)
+        self.values = np.zeros((0, len(METRICS)), dtype=np.int64)
+        self.matches = {}                               # Match_ID → (cells, values) it added
+        self._ids = {}                                  # name → player ID
+        self._cell = {}                                 # (raider ID, defender ID) → cell
+        self._by_raider = {}                            # raider ID → cells (a CSR row)
+        self._by_defender = {}                          # defender ID → cells (a CSR column)
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.cells)
+
+    def _id(self, name):
+        pid = self._ids.get(name)
+        if pid is None:
+            pid = self._ids[name] = len(self.players)
+            self.players.append(name)
+        return pid
+
+    def _cell_of(self, raider, defender):
+        key = (self._id(raider), self._id(defender))
+        cell = self._cell.get(key)
+        if cell is None:
+            cell = self._cell[key] = len(self.cells)
+            self.cells.append(key)
+            self._by_raider.setdefault(key[0], []).append(cell)
+            self._by_defender.setdefault(key[1], []).append(cell)
+        return cell
+
+    def _grow(self):
+        if len(self.cells) > len(self.values):
+            extra = np.zeros((len(self.cells) - len(self.values), len(METRICS)), dtype=np.int64)
+            self.values = np.concatenate([self.values, extra])
+
+    # ------ Updates ------
+
+    def add_match(self, version):
+        # version: incremental.MatchVersion of one processed match
+        processed = version.processed
+        match_id = str(processed['Match_ID'].iloc[0])
+        names, values = contribution(processed)
+        with self._lock:
+            ids = np.array([self._cell_of(r, d) for r, d in names], dtype=np.int64)
+            cells, inverse = np.unique(ids, return_inverse=True)
+            summed = np.zeros((len(cells), len(METRICS)), dtype=np.int64)
+            np.add.at(summed, inverse, values)
+
+            self._grow()
+            self._subtract(match_id)
+            self.values[cells] += summed
+            self.matches[match_id] = (cells, summed)
+
+    def remove_match(self, match_id):
+        with self._lock:
+            self._subtract(str(match_id))
+
+    def _subtract(self, match_id):
+        old = self.matches.pop(match_id, None)
+        if old is not None:
+            cells, summed = old
+            self.values[cells] -= summed
+
+    # ------ Lookups (O(cells of that player)) ------
+
+    def _frame(self, cells, side):
+        cells = [c for c in cells if self.values[c].any()]
+        names = [self.players[self.cells[c][side]] for c in cells]
+        index = pd.Index(names, name='Defender' if side else 'Raider')
+        return pd.DataFrame(self.values[cells], index=index, columns=METRICS).sort_values(
+            'encounters', ascending=False, kind='stable')
+
+    def pair(self, raider, defender):
+        cell = self._cell.get((self._ids.get(raider), self._ids.get(defender)))
+        if cell is None:
+            return pd.Series(0, index=METRICS, dtype=np.int64)
+        return pd.Series(self.values[cell], index=METRICS)
+
+    def raider(self, name):
+        # Every defender this raider met → counts (a CSR row)
+        return self._frame(self._by_raider.get(self._ids.get(name), []), 1)
+
+    def defender(self, name):
+        # Every raider this defender met → counts (a CSR column)
+        return self._frame(self._by_defender.get(self._ids.get(name), []), 0)
+
+    def coo(self, metric):
+        # (raider IDs, defender IDs, counts) of the non-zero cells
+        pairs = np.array(self.cells, dtype=np.int64).reshape(-1, 2)
+        data = self.values[:, METRIC[metric]]
+        nz = data != 0
+        return pairs[nz, 0], pairs[nz, 1], data[nz]
+
+    def csr(self, metric):
+        # (indptr, indices, data) over players x players; row = raider ID, column = defender ID
+        rows, cols, data = self.coo(metric)
+        order = np.lexsort((cols, rows))
+        indptr = np.concatenate([[0], np.cumsum(np.bincount(rows, minlength=len(self.players)))])
+        return indptr, cols[order], data[order]
+
+    # ------ Persistence ------
+
+    def save(self, path):
+        folder = os.path.dirname(path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        with self._lock:
+            match_ids = list(self.matches)
+            cells = [self.matches[m][0] for m in match_ids]
+            tmp = path + '.tmp.npz'
+            np.savez_compressed(
+                tmp,
+                metrics=np.array(METRICS), players=np.array(self.players, dtype=str),
+                cells=np.array(self.cells, dtype=np.int32).reshape(-1, 2), values=self.values.astype(np.int32),
+                match_ids=np.array(match_ids, dtype=str),
+                match_sizes=np.array([len(c) for c in cells], dtype=np.int64),
+                match_cells=np.concatenate(cells).astype(np.int32) if cells else np.zeros(0, dtype=np.int32),
+                match_values=np.concatenate([self.matches[m][1] for m in match_ids]).astype(np.int32) if cells
+                else np.zeros((0, len(METRICS)), dtype=np.int32))
+            os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path):
+        matrix = cls()
+        if not os.path.exists(path):
+            return matrix
+        with np.load(path) as data:
+            # Metrics added since the file was written start at 0, dropped ones are ignored
+            metrics = data['metrics'].tolist()
+            src = [i for i, m in enumerate(metrics) if m in METRIC]
+            dst = [METRIC[metrics[i]] for i in src]
+
+            def widen(values):
+                out = np.zeros((len(values), len(METRICS)), dtype=np.int64)
+                out[:, dst] = values[:, src]
+                return out
+
+            players = data['players'].tolist()
+            for name in players:
+                matrix._id(name)
+            for raider, defender in data['cells'].tolist():
+                matrix._cell_of(players[raider], players[defender])
+            matrix.values = widen(data['values'])
+            offsets = np.concatenate([[0], np.cumsum(data['match_sizes'])])
+            match_cells = data['match_cells'].astype(np.int64)
+            match_values = widen(data['match_values'])
+            for i, match_id in enumerate(data['match_ids'].tolist()):
+                part = slice(offsets[i], offsets[i + 1])
+                matrix.matches[match_id] = (match_cells[part], match_values[part])
+        return matrix
+
+
+def update_matchups(path, version):
+    matrix = MatchupMatrix.load(path)
+    matrix.add_match(version)
+    matrix.save(path)
+    return matrix
+
+
+# python matchups.py archive/matchups.npz "Pawan Sehrawat" [--defender "Fazel Atrachali"]
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Print head-to-head counts from a matchup matrix.")
+    parser.add_argument('matrix')
+    parser.add_argument('player')
+    parser.add_argument('--defender', help="only this defender (player is the raider)")
+    parser.add_argument('--as-defender', action='store_true', help="player is the defender: list raiders")
+    args = parser.parse_args()
+
+    matrix = MatchupMatrix.load(args.matrix)
+    if args.defender:
+        matrix.pair(args.player, args.defender).to_csv(sys.stdout, header=False)
+    elif args.as_defender:
+        matrix.defender(args.player).to_csv(sys.stdout)
+    else:
+        matrix.raider(args.player).to_csv(sys.stdout)
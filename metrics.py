@@ -0,0 +1,247 @@
+import os
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter, OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+# ---------------------------
+# Pipeline metrics (Prometheus text format)
+# ---------------------------
+# Counters and histograms kept in memory by the process that runs the pipeline. Recording
+# one upload is a handful of dict updates, and the QC counts are one pass over its
+# violations, so the overhead is nothing next to the processing itself.
+#
+#   METRICS.render()                  # Prometheus text exposition
+#   METRICS.dump("metrics.prom")      # batch mode (e.g. for node_exporter's textfile collector)
+#   serve(9108)                       # GET http://127.0.0.1:9108/metrics
+#
+#   pkl_matches_processed_total{engine, cached}   uploads processed (cached="true": read from the cache)
+#   pkl_raids_processed_total{engine}             raid rows in them
+#   pkl_uploads_failed_total{engine}              uploads that could not be processed
+#   pkl_stage_seconds{stage}                      latency per stage (cache, parse, transform, qc, finalize, total)
+#   pkl_qc_violations_total{qc, team}             QC messages, by the raiding team of the flagged raid
+#   pkl_qc_matches_flagged_total{qc}              uploads where the QC fired at least once
+#   pkl_match_qc_violations{match_id, qc}         QC messages in the latest upload of each match
+#
+# A QC that suddenly fires on every match shows as pkl_qc_matches_flagged_total rising as
+# fast as pkl_matches_processed_total.
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+MAX_MATCHES = int(os.environ.get('PKL_METRICS_MATCHES', 500))
+
+
+def lap(timings, stage, start):
+    # Adds the time since start to timings[stage] (if timings is given); returns now
+    now = time.perf_counter()
+    if timings is not None:
+        timings[stage] = timings.get(stage, 0.0) + now - start
+    return now
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{n}="{_escape(v)}"' for n, v in pairs) + '}'
+
+
+def _number(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+
+# ------ Metric types ------
+
+class Metric:
+    kind = 'untyped'
+
+    def __init__(self, name, doc, labels=()):
+        self.name = name
+        self.doc = doc
+        self.labels = tuple(labels)
+        self._values = {}                   # label values → value
+        self._lock = threading.Lock()
+
+    def remove(self, *values):
+        with self._lock:
+            self._values.pop(tuple(str(v) for v in values), None)
+
+    def samples(self):
+        # [(name suffix, label values, extra labels, value), ...]
+        with self._lock:
+            return [('', key, (), value) for key, value in sorted(self._values.items())]
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.doc}", f"# TYPE {self.name} {self.kind}"]
+        for suffix, key, extra, value in self.samples():
+            lines.append(f"{self.name}{suffix}{_labels(self.labels, key, extra)} {_number(value)}")
+        return lines
+
+
+class CounterMetric(Metric):
+    kind = 'counter'
+
+    def inc(self, *values, amount=1):
+        key = tuple(str(v) for v in values)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(Metric):
+    kind = 'gauge'
+
+    def set(self, value, *values):
+        with self._lock:
+            self._values[tuple(str(v) for v in values)] = value
+
+
+class Histogram(Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, doc, labels=(), buckets=BUCKETS):
+        super().__init__(name, doc, labels)
+        self.buckets = tuple(buckets)
+
+    def observe(self, seconds, *values):
+        key = tuple(str(v) for v in values)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            entry[0][bisect_left(self.buckets, seconds)] += 1
+            entry[1] += seconds
+            entry[2] += 1
+
+    def samples(self):
+        with self._lock:
+            entries = [(key, list(counts), total, n) for key, (counts, total, n) in sorted(self._values.items())]
+        out = []
+        for key, counts, total, n in entries:
+            running = 0
+            for bound, count in zip(self.buckets + (float('inf'),), counts):
+                running += count
+                out.append(('_bucket', key, (('le', _number(bound)),), running))
+            out.append(('_sum', key, (), total))
+            out.append(('_count', key, (), n))
+        return out
+
+
+# ------ What the pipeline records ------
+
+def observation(result, engine):
+    # Plain, picklable summary of one processing.ProcessResult (service workers send it back
+    # to the HTTP process, which records it)
+    version = result.version
+    teams = [] if version.teams is None else version.teams.tolist()
+    counts = Counter((int(v.qc), teams[v.row] if 0 <= v.row < len(teams) else '') for v in version.violations)
+    return {'match_id': str(result.match_id), 'engine': engine, 'cached': version.raw is None,
+            'raids': len(version.processed), 'timings': dict(result.timings),
+            'violations': [(qc, team, n) for (qc, team), n in counts.items()]}
+
+
+class PipelineMetrics:
+
+    def __init__(self, max_matches=MAX_MATCHES):
+        self.matches = CounterMetric('pkl_matches_processed_total', "Uploads processed.", ['engine', 'cached'])
+        self.raids = CounterMetric('pkl_raids_processed_total', "Raid rows processed.", ['engine'])
+        self.failed = CounterMetric('pkl_uploads_failed_total', "Uploads that could not be processed.", ['engine'])
+        self.stages = Histogram('pkl_stage_seconds', "Processing latency per stage.", ['stage'])
+        self.violations = CounterMetric('pkl_qc_violations_total', "QC messages by raiding team.", ['qc', 'team'])
+        self.flagged = CounterMetric('pkl_qc_matches_flagged_total', "Uploads where the QC fired.", ['qc'])
+        self.per_match = Gauge('pkl_match_qc_violations', "QC messages in the latest upload of a match.",
+                               ['match_id', 'qc'])
+        self.max_matches = max_matches
+        self._match_qcs = OrderedDict()     # match_id → QCs set in per_match, oldest match first
+        self._lock = threading.Lock()
+
+    def all(self):
+        return [self.matches, self.raids, self.failed, self.stages, self.violations, self.flagged, self.per_match]
+
+    def record(self, obs):
+        # obs: observation() of one upload
+        self.matches.inc(obs['engine'], 'true' if obs['cached'] else 'false')
+        self.raids.inc(obs['engine'], amount=obs['raids'])
+        for stage, seconds in obs['timings'].items():
+            self.stages.observe(seconds, stage)
+
+        per_qc = Counter()
+        for qc, team, n in obs['violations']:
+            self.violations.inc(qc, team or 'unknown', amount=n)
+            per_qc[qc] += n
+        for qc in per_qc:
+            self.flagged.inc(qc)
+
+        # Latest upload of each match replaces its previous counts; the oldest matches drop out
+        match_id = obs['match_id']
+        with self._lock:
+            for qc in self._match_qcs.pop(match_id, ()):
+                self.per_match.remove(match_id, qc)
+            for qc, n in per_qc.items():
+                self.per_match.set(n, match_id, qc)
+            self._match_qcs[match_id] = list(per_qc)
+            while len(self._match_qcs) > self.max_matches:
+                old, qcs = self._match_qcs.popitem(last=False)
+                for qc in qcs:
+                    self.per_match.remove(old, qc)
+
+    def record_failure(self, engine):
+        self.failed.inc(engine)
+
+    def render(self):
+        return '\n'.join(line for metric in self.all() for line in metric.render()) + '\n'
+
+    def dump(self, path):
+        folder = os.path.dirname(path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        tmp = path + '.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            f.write(self.render())
+        os.replace(tmp, path)
+
+
+METRICS = PipelineMetrics()
+
+
+# ------ Local endpoint ------
+
+class _Handler(BaseHTTPRequestHandler):
+    metrics = METRICS
+
+    def do_GET(self):
+        if self.path.split('?')[0] != '/metrics':
+            self.send_error(404)
+            return
+        body = self.metrics.render().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', CONTENT_TYPE)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+_servers = {}
+_serving = threading.Lock()
+
+
+def serve(port, host='127.0.0.1', metrics=METRICS):
+    # Serves /metrics from a background thread; calling it again for the same port is a no-op
+    with _serving:
+        if port not in _servers:
+            handler = type('Handler', (_Handler,), {'metrics': metrics})
+            server = ThreadingHTTPServer((host, port), handler)
+            server.daemon_threads = True
+            threading.Thread(target=server.serve_forever, daemon=True).start()
+            _servers[port] = server
+        return _servers[port]
@@ -0,0 +1,252 @@
+import os
+import sys
+import threading
+
+import numpy as np
+import pandas as pd
+
+from layout import (OUTCOME_COLS, ZONE_COLS, ATT_SKILL_COLS, DS_SKILL_COLS, CA_COLS,
+                    FLAG_COLUMNS, DEFENDER_NAME_COLS)
+
+
+# ---------------------------
+# Per-player / per-team aggregate cube
+# ---------------------------
+# One row per (Season_ID, team, player), one int64 column per dimension. Every match
+# adds its own contribution; re-processing a match subtracts its old contribution first,
+# so the season totals never need a group-by over all processed CSVs.
+#
+#   cube = PlayerCube.load("archive/player_cube.npz")
+#   cube.row("S12", "Bengal Warriors", "Maninder Singh")["touch_points"]
+#   cube.team("S12", "Bengal Warriors")          # players x dimensions
+#
+# Raider dimensions are counted for the raiding team, defender dimensions for the other
+# team of the match (a defender named in a raid gets that raid's capture points).
+
+RAID_LENGTHS = range(0, 31)
+
+RAIDER_DIMS = [
+    'raids',
+    *(f'outcome:{c}' for c in OUTCOME_COLS),
+    'touch_points', 'bonus_points', 'raid_points', 'raid_length_total',
+    *(f'raid_length:{s}' for s in RAID_LENGTHS),
+    *(f'zone:{c}' for c in ZONE_COLS),
+    *(f'attack:{c}' for c in ATT_SKILL_COLS),
+    *(f'counter:{c}' for c in CA_COLS),
+]
+DEFENDER_DIMS = [
+    'defends', 'tackles', 'capture_points',
+    *(f'defence:{c}' for c in DS_SKILL_COLS),
+]
+DIMENSIONS = RAIDER_DIMS + DEFENDER_DIMS
+DIM = {d: i for i, d in enumerate(DIMENSIONS)}
+
+KEY_FIELDS = ['Season_ID', 'Team', 'Player']
+
+
+def _flag_cols(cols):
+    return [FLAG_COLUMNS.index(c) for c in cols]
+
+
+def _points(processed, col):
+    return pd.to_numeric(processed[col], errors='coerce').fillna(0).to_numpy(np.int64)
+
+
+def _defending_teams(teams):
+    # Two-team match: the defending team is the other one
+    names = sorted(set(teams) - {''})
+    if len(names) != 2:
+        return np.full(len(teams), '', dtype=object)
+    other = {names[0]: names[1], names[1]: names[0]}
+    return np.array([other.get(t, '') for t in teams], dtype=object)
+
+
+def contribution(version):
+    # version: incremental.MatchVersion → (keys, values): one value row per (season, team, player)
+    processed, flags = version.processed, version.flags.astype(np.int64)
+    n = len(processed)
+    season = processed['Season_ID'].astype(str).to_numpy()
+    teams = np.asarray(version.teams, dtype=object)
+    defending = _defending_teams(teams)
+
+    # ------ Raider rows ------
+    raider = np.zeros((n, len(DIMENSIONS)), dtype=np.int64)
+    raider[:, DIM['raids']] = 1
+    for cols, prefix in ((OUTCOME_COLS, 'outcome'), (ZONE_COLS, 'zone'),
+                         (ATT_SKILL_COLS, 'attack'), (CA_COLS, 'counter')):
+        raider[:, [DIM[f'{prefix}:{c}'] for c in cols]] = flags[:, _flag_cols(cols)]
+    raider[:, DIM['touch_points']] = _points(processed, 'Raiding_Touch_Points')
+    raider[:, DIM['bonus_points']] = _points(processed, 'Raiding_Bonus_Points')
+    raider[:, DIM['raid_points']] = _points(processed, 'Raiding_Team_Points')
+
+    length = _points(processed, 'Raid_Length')
+    raider[:, DIM['raid_length_total']] = length
+    bucket = np.clip(length, RAID_LENGTHS.start, RAID_LENGTHS.stop - 1)
+    raider[np.arange(n), DIM['raid_length:0'] + bucket] = 1
+
+    keys = list(zip(season, teams, processed['Raider_Name']))
+    parts = [raider]
+
+    # ------ Defender rows (one per named defender) ------
+    defender = np.zeros((n, len(DIMENSIONS)), dtype=np.int64)
+    defender[:, DIM['defends']] = 1
+    defender[:, DIM['tackles']] = flags[:, FLAG_COLUMNS.index('Unsuccessful')]
+    defender[:, DIM['capture_points']] = _points(processed, 'Defending_Capture_Points')
+    defender[:, [DIM[f'defence:{c}'] for c in DS_SKILL_COLS]] = flags[:, _flag_cols(DS_SKILL_COLS)]
+    for col in DEFENDER_NAME_COLS:
+        keys += zip(season, defending, processed[col])
+        parts.append(defender)
+
+    values = np.concatenate(parts)
+    named = np.array([isinstance(p, str) and p != '' for _, _, p in keys])
+    keys = [k for k, ok in zip(keys, named) if ok]
+    return keys, values[named]
+
+
+class PlayerCube:
+
+    def __init__(self):
+        self.keys = []                                  # row → (season, team, player)
+        self.values = np.zeros((0, len(DIMENSIONS)), dtype=np.int64)
+        self.matches = {}                               # Match_ID → (rows, values) it added
+        self._rows = {}                                 # (season, team, player) → row
+        self._by_team = {}                              # (season, team) → rows
+        self._by_player = {}                            # player → rows
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.keys)
+
+    def _row(self, key):
+        row = self._rows.get(key)
+        if row is None:
+            row = self._rows[key] = len(self.keys)
+            self.keys.append(key)
+            self._by_team.setdefault(key[:2], []).append(row)
+            self._by_player.setdefault(key[2], []).append(row)
+        return row
+
+    def _grow(self):
+        if len(self.keys) > len(self.values):
+            extra = np.zeros((len(self.keys) - len(self.values), len(DIMENSIONS)), dtype=np.int64)
+            self.values = np.concatenate([self.values, extra])
+
+    # ------ Updates ------
+
+    def add_match(self, version):
+        match_id = str(version.processed['Match_ID'].iloc[0])
+        keys, values = contribution(version)
+        with self._lock:
+            ids = np.array([self._row(k) for k in keys], dtype=np.int64)
+            rows, inverse = np.unique(ids, return_inverse=True)
+            summed = np.zeros((len(rows), len(DIMENSIONS)), dtype=np.int64)
+            np.add.at(summed, inverse, values)
+
+            self._grow()
+            self._subtract(match_id)
+            self.values[rows] += summed
+            self.matches[match_id] = (rows, summed)
+
+    def remove_match(self, match_id):
+        with self._lock:
+            self._subtract(str(match_id))
+
+    def _subtract(self, match_id):
+        old = self.matches.pop(match_id, None)
+        if old is not None:
+            rows, summed = old
+            self.values[rows] -= summed
+
+    # ------ Lookups ------
+
+    def _frame(self, rows):
+        rows = list(rows)
+        index = pd.MultiIndex.from_tuples([self.keys[r] for r in rows], names=KEY_FIELDS) if rows else \
+            pd.MultiIndex.from_tuples([], names=KEY_FIELDS)
+        return pd.DataFrame(self.values[rows], index=index, columns=DIMENSIONS)
+
+    def row(self, season, team, player):
+        row = self._rows.get((season, team, player))
+        if row is None:
+            return pd.Series(0, index=DIMENSIONS, dtype=np.int64)
+        return pd.Series(self.values[row], index=DIMENSIONS)
+
+    def team(self, season, team):
+        return self._frame(self._by_team.get((season, team), []))
+
+    def player(self, player):
+        return self._frame(self._by_player.get(player, []))
+
+    def frame(self):
+        return self._frame(range(len(self.keys)))
+
+    # ------ Persistence ------
+
+    def save(self, path):
+        folder = os.path.dirname(path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        with self._lock:
+            match_ids = list(self.matches)
+            rows = [self.matches[m][0] for m in match_ids]
+            keys = np.array(self.keys, dtype=str).reshape(-1, len(KEY_FIELDS))
+            tmp = path + '.tmp.npz'
+            np.savez(tmp,
+                     dims=np.array(DIMENSIONS), keys=keys, values=self.values,
+                     match_ids=np.array(match_ids, dtype=str),
+                     match_sizes=np.array([len(r) for r in rows], dtype=np.int64),
+                     match_rows=np.concatenate(rows) if rows else np.zeros(0, dtype=np.int64),
+                     match_values=np.concatenate([self.matches[m][1] for m in match_ids]) if rows
+                     else np.zeros((0, len(DIMENSIONS)), dtype=np.int64))
+            os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path):
+        cube = cls()
+        if not os.path.exists(path):
+            return cube
+        with np.load(path) as data:
+            # Dimensions added since the file was written start at 0, dropped ones are ignored
+            dims = data['dims'].tolist()
+            src = [i for i, d in enumerate(dims) if d in DIM]
+            dst = [DIM[dims[i]] for i in src]
+
+            def widen(values):
+                out = np.zeros((len(values), len(DIMENSIONS)), dtype=np.int64)
+                out[:, dst] = values[:, src]
+                return out
+
+            for key in map(tuple, data['keys'].tolist()):
+                cube._row(key)
+            cube.values = widen(data['values'])
+            offsets = np.concatenate([[0], np.cumsum(data['match_sizes'])])
+            match_values = widen(data['match_values'])
+            for i, match_id in enumerate(data['match_ids'].tolist()):
+                part = slice(offsets[i], offsets[i + 1])
+                cube.matches[match_id] = (data['match_rows'][part], match_values[part])
+        return cube
+
+
+def update_cube(path, version):
+    cube = PlayerCube.load(path)
+    cube.add_match(version)
+    cube.save(path)
+    return cube
+
+
+# python player_cube.py archive/player_cube.npz "Bengal Warriors"
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Print season totals from a player cube.")
+    parser.add_argument('cube')
+    parser.add_argument('team', nargs='?', help="only this team")
+    parser.add_argument('--season', default=None)
+    args = parser.parse_args()
+
+    cube = PlayerCube.load(args.cube)
+    table = cube.frame()
+    if args.team:
+        season = args.season or table.index.get_level_values('Season_ID').max()
+        table = cube.team(season, args.team)
+    table.to_csv(sys.stdout)
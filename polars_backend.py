@@ -0,0 +1,137 @@
+# ---------------------------
+# Polars Engine
+# ---------------------------
+# Same rules as pipeline.transform_pandas, expressed as one lazy Polars query plan.
+# Output must stay byte-identical to the pandas engine once written with to_csv.
+
+import polars as pl
+
+from layout import (
+    TOURNAMENT_ID, SEASON_ID, RAID_COLS, DEFENDER_COLS, RT_COLS, DT_COLS, DSO_COLS, RL_COLS,
+    BONUS_COLS, LABEL_GROUPS, DEFENDER_NAME_COLS, NAME_COLS, NEW_COLUMNS, OUTPUT_ORDER,
+    match_number,
+)
+
+
+# ------ Expression Helpers ------
+
+def _flag(col):
+    # Same coercion as pd.to_numeric(..., errors='coerce').fillna(0).astype(int)
+    return (pl.col(col).str.strip_chars().cast(pl.Float64, strict=False)
+            .fill_nan(None).fill_null(0).cast(pl.Int64))
+
+
+def _weighted_sum(cols, prefix):
+    # Flag set → its numeric suffix (e.g., RT3 → 3), summed across the group
+    return pl.sum_horizontal(
+        pl.when(_flag(c) == 1).then(int(c[len(prefix):])).otherwise(0) for c in cols
+    ).cast(pl.Int64)
+
+
+def _labels(cols, sep):
+    # Flag set → column name, joined with sep ('' when nothing is set)
+    return pl.concat_str(
+        [pl.when(_flag(c) == 1).then(pl.lit(c)) for c in cols],
+        separator=sep, ignore_nulls=True)
+
+
+def _seconds(col):
+    # "mm:ss,ms" or "hh:mm:ss,ms" → whole seconds
+    parts = pl.col(col).str.split(',').list.first().str.split(':')
+    n = parts.list.len()
+
+    def part(i):
+        return parts.list.get(i, null_on_oob=True).str.strip_chars().cast(pl.Int64)
+
+    return (pl.when(n == 2).then(part(0) * 60 + part(1))
+            .when(n == 3).then(part(0) * 3600 + part(1) * 60 + part(2)))
+
+
+def _name(i):
+    # i-th "number-name" entry of Player → Title case name
+    players = pl.col('Player').str.replace_all(r'\s*\|\s*', '|').str.split('|')
+    return (players.list.get(i, null_on_oob=True)
+            .str.splitn('-', 2).struct.field('field_1')
+            .str.strip_chars().str.to_titlecase())
+
+
+def _mmss(secs):
+    return pl.concat_str([(secs // 60).cast(pl.String).str.zfill(2),
+                          (secs % 60).cast(pl.String).str.zfill(2)], separator=':')
+
+
+# ------ Query Plan ------
+
+def transform_lazy(lf, match_id):
+    # lf: LazyFrame of raid rows with the 122 raw column names (String)
+
+    # Raid 1/2/3 keep non-1 values as they are, like the pandas engine
+    raid_number = pl.sum_horizontal(
+        pl.when(_flag(c) == 1).then(int(c[-1])).otherwise(_flag(c)) for c in RAID_COLS)
+
+    bonus_yes = pl.max_horizontal(_flag(c) for c in BONUS_COLS) == 1
+    bonus_no = _flag('No Bonus') == 1
+
+    base = lf.select(
+        pl.col('Name').alias('Event_Number'),
+        pl.col('Technical Point').alias('Technical_Point'),
+        pl.col('All Out').str.strip_chars().cast(pl.Float64, strict=False).fill_nan(None).alias('All_Out'),
+        raid_number.cast(pl.Int64).alias('Raid_Number'),
+        _weighted_sum(DEFENDER_COLS, 'D').alias('Number_of_Defenders'),
+        pl.when(bonus_yes & bonus_no).then(pl.lit('Yes No'))
+          .when(bonus_yes).then(pl.lit('Yes'))
+          .otherwise(pl.lit('No')).alias('Bonus'),
+        *(_labels(cols, sep).alias(out) for out, (cols, sep) in LABEL_GROUPS.items()),
+        _weighted_sum(RT_COLS, 'RT').alias('Raiding_Team_Points'),
+        _weighted_sum(DT_COLS, 'DT').alias('Defending_Team_Points'),
+        _weighted_sum(DSO_COLS, 'DS').alias('Number_of_Defenders_Self_Out'),
+        (30 - _weighted_sum(RL_COLS, 'RL')).alias('Raid_Length'),
+        *(_name(i).alias(col) for i, col in enumerate(NAME_COLS)),
+        _mmss(_seconds('Stop') - _seconds('Start')).alias('Time'),
+        _seconds('Start').alias('Video_Link'),
+    )
+
+    # ------ Match Metadata & empty new columns ------
+    base = base.with_columns(
+        pl.lit(TOURNAMENT_ID).alias('Tournament_ID'),
+        pl.lit(SEASON_ID).alias('Season_ID'),
+        pl.lit(match_number(match_id), dtype=pl.Int64).alias('Match_No'),
+        pl.lit("M" + str(match_id)).alias('Match_ID'),
+        pl.int_range(1, pl.len() + 1, dtype=pl.Int64).alias('Match_Raid_Number'),
+        *(pl.lit(None).alias(c) for c in NEW_COLUMNS if c != 'Video_Link'),
+    )
+
+    # ------ Points Columns ------
+    successful = pl.col('Outcome') == 'Successful'
+    unsuccessful = pl.col('Outcome') == 'Unsuccessful'
+    all_out = (pl.col('All_Out') == 1).fill_null(False)
+    raider_self_out = (pl.col('Defensive_Skill') == 'Raider self out').cast(pl.Int64)
+    touched = pl.sum_horizontal(pl.col(c).is_not_null().cast(pl.Int64) for c in DEFENDER_NAME_COLS)
+
+    points = base.with_columns(
+        (pl.col('Bonus') == 'Yes').cast(pl.Int64).alias('Raiding_Bonus_Points'),
+        pl.when(successful).then(touched - pl.col('Number_of_Defenders_Self_Out'))
+          .otherwise(0).cast(pl.Int64).alias('Raiding_Touch_Points'),
+        ((successful & all_out).cast(pl.Int64) * 2).alias('Raiding_All_Out_Points'),
+        pl.col('Number_of_Defenders_Self_Out').alias('Raiding_Self_Out_Points'),
+        ((pl.col('Number_of_Defenders') <= 3) & unsuccessful).cast(pl.Int64).alias('Defending_Bonus_Points'),
+        raider_self_out.alias('Raider_Self_Out'),
+        (unsuccessful & (raider_self_out == 0)).cast(pl.Int64).alias('Defending_Capture_Points'),
+        ((unsuccessful & all_out).cast(pl.Int64) * 2).alias('Defending_All_Out_Points'),
+        raider_self_out.alias('Defending_Self_Out_Points'),
+        pl.col('Outcome').alias('Event'),
+        pl.int_range(1, pl.len() + 1, dtype=pl.Int64).alias('Video'),
+    )
+
+    return points.select(OUTPUT_ORDER)
+
+
+def transform_polars(df, match_id):
+    # pandas in / pandas out, so the QCs and to_csv stay shared with the pandas engine
+    lf = pl.from_pandas(df.astype(object), schema_overrides={c: pl.String for c in df.columns}).lazy()
+    out = transform_lazy(lf, match_id).collect().to_pandas()
+
+    # pd.to_numeric keeps All_Out integer when nothing is missing
+    if out['All_Out'].notna().all():
+        out['All_Out'] = out['All_Out'].astype(int)
+    return out
@@ -0,0 +1,250 @@
+import csv
+import re
+import sys
+from collections import Counter, deque, namedtuple
+
+from layout import (RAW_COLUMNS, FLAG_COLUMNS, RAID_COLS, DEFENDER_COLS, OUTCOME_COLS, RL_COLS, TIE_COLS, ONE_HOT_GROUPS,
+                    EXACTLY_ONE, ANY)
+
+
+# ---------------------------
+# Fast pre-validator (standard library only)
+# ---------------------------
+# Checks a raw export without pandas or Streamlit, fast enough to run on every save:
+#
+#   python prevalidate.py export.csv [more.csv ...]
+#
+# The file is read one row at a time, keeping only the last 3 raids, and checked for:
+#   - the 'Name' header row: 122 columns named as in layout.RAW_COLUMNS
+#   - QC 1 (empty values), QC 4-7 (raid numbering, ±2 raids), QC 11 (Raid_Length),
+#     QC 12 (Number_of_Defenders) and QC 26 (one-hot flag groups)
+# Messages are the same lines the QC log of the app shows, printed as they are found.
+# The exit code is 1 when anything was found.
+
+Violation = namedtuple('Violation', ['qc', 'kind', 'row', 'event', 'line'])    # as in qc.py; qc None: layout
+
+# Cells pandas reads as missing (read_raw)
+NA_VALUES = {'', '#N/A', '#N/A N/A', '#NA', '-1.#IND', '-1.#QNAN', '-NaN', '-nan', '1.#IND', '1.#QNAN',
+             '<NA>', 'N/A', 'NA', 'NULL', 'NaN', 'None', 'n/a', 'nan', 'null'}
+COLUMN = {c: i for i, c in enumerate(RAW_COLUMNS)}
+WINDOW = 2         # QC 4-7 look two raids back / ahead
+CARDINALITY = [(group, [COLUMN[c] for c in cols], cols, card)
+               for group, (cols, card) in ONE_HOT_GROUPS.items() if card != ANY]
+
+
+def _number(cell):
+    try:
+        return float(cell)
+    except ValueError:
+        return None
+
+
+def _flag(cell):
+    # A flag is set when its cell reads as the number 1 (pipeline.flag_matrix)
+    return cell not in NA_VALUES and _number(cell) == 1
+
+
+def _set_flags(cells):
+    # Column positions of the flags set in one raw row ('0', '1' and '' need no parsing)
+    return {i for i in FLAG_IDX if cells[i] == '1' or (cells[i] not in ('0', '') and _flag(cells[i]))}
+
+
+def _weighted(on, idx):
+    # Flags weighted by their position in the group (Raid 1-3, D1-D7, RL1-30), summed
+    return sum(w for w, i in enumerate(idx, 1) if i in on)
+
+
+def _labels(on, cols, sep):
+    return sep.join(c for c in cols if COLUMN[c] in on)
+
+
+def _is_blank(value):
+    return value is None or value.strip() == '' or value.strip().lower() in ('na', 'nan')
+
+
+def _raider(player):
+    # Raider_Name as the pipeline derives it from 'Player' (None when it would be missing)
+    if player in NA_VALUES:
+        return None
+    name = re.split(r'\s*\|\s*', player)[0].split('-', 1)
+    return name[1].strip().title() if len(name) > 1 else None
+
+
+FLAG_IDX = [COLUMN[c] for c in FLAG_COLUMNS]
+RAID_IDX = [COLUMN[c] for c in RAID_COLS]
+DEFENDER_IDX = [COLUMN[c] for c in DEFENDER_COLS]
+RL_IDX = [COLUMN[c] for c in RL_COLS]
+
+
+class _Raid:
+    # The transformed values the checks read, from one raw row
+    __slots__ = ('row', 'event', 'raid_number', 'outcome', 'raid_length', 'defenders')
+
+    def __init__(self, row, cells, on):
+        self.row = row
+        self.event = cells[0]
+        self.raid_number = _weighted(on, RAID_IDX)
+        self.outcome = _labels(on, OUTCOME_COLS, ' ')
+        self.raid_length = 30 - _weighted(on, RL_IDX)
+        self.defenders = _weighted(on, DEFENDER_IDX)
+
+
+# ------ Single-raid checks ------
+
+def _qc_1(raid, cells, on):
+    all_out = cells[COLUMN['All Out']]
+    values = {
+        'Outcome': raid.outcome,
+        'All_Out': None if all_out in NA_VALUES or _number(all_out) is None else all_out,
+        'Raider_Name': _raider(cells[COLUMN['Player']]),
+        'Tie_Break_Raids': _labels(on, TIE_COLS, ', '),
+    }
+    # Raid_Length, Bonus, Raid_Number and Number_of_Defenders always get a value
+    empty = [c for c in ['Raid_Length', 'Outcome', 'Bonus', 'All_Out', 'Raid_Number', 'Raider_Name',
+                         'Number_of_Defenders', 'Tie_Break_Raids'] if c in values and _is_blank(values[c])]
+    if empty:
+        yield Violation(1, None, raid.row, raid.event,
+                        f"\n❌ {raid.event}: Empty in columns → {', '.join(empty)}. Please check and update.\n")
+
+
+def _qc_11(raid):
+    if raid.raid_length <= 2:
+        yield Violation(11, None, raid.row, raid.event, f"⚠️ {raid.event}: Raid_Length is {raid.raid_length}\n")
+
+
+def _qc_12(raid):
+    if raid.defenders <= 0:
+        yield Violation(12, None, raid.row, raid.event,
+                        f"❌ {raid.event}: Number_of_Defenders is --> {raid.defenders}, Check \n")
+
+
+def _qc_26(raid, on):
+    for group, idx, cols, card in CARDINALITY:
+        found = [c for c, i in zip(cols, idx) if i in on]
+        low, high = card
+        if not low <= len(found) <= high:
+            expected = 'exactly one' if card == EXACTLY_ONE else 'at most one'
+            yield Violation(26, group, raid.row, raid.event,
+                            f"❌ {raid.event}: {group} flags set → {', '.join(found) or 'none'}. Expected {expected}.\n")
+
+
+# ------ ±2 raid checks (back: the raid two before, new: the raid just read) ------
+
+def _qc_4(back, new):
+    if new.raid_number == 3 and back.outcome != 'Empty':
+        yield Violation(4, None, new.row, back.event,
+                        f"❌ {back.event}: → Outcome must be 'Empty' (Because {new.event} has Raid_Number = 3)\n")
+
+
+def _qc_5(back, new):
+    if back.raid_number == 1 and back.outcome == 'Empty' and new.raid_number != 2:
+        yield Violation(5, None, back.row, new.event,
+                        f"❌ {new.event}: → Raid_Number must be = 2 (Because {back.event} Raid_Number is 1)\n")
+
+
+def _qc_6(back, new):
+    if back.outcome.strip().lower() in ('successful', 'unsuccessful') and new.raid_number != 1:
+        yield Violation(6, None, back.row, new.event,
+                        f"❌ {new.event}: → Raid_Number must be = 1 (Because {back.event} has Outcome = {back.outcome})\n")
+
+
+def _qc_7(back, new):
+    if new.raid_number == 2 and new.outcome == 'Empty' and (back.raid_number != 1 or back.outcome != 'Empty'):
+        yield Violation(7, None, new.row, new.event,
+                        f"❌ {new.event} is Empty, but {back.event} has {back.raid_number} Raid Number and Outcome='{back.outcome}'\n")
+
+
+# ------ Whole file ------
+
+def check_header(cells):
+    # Violations of the 'Name' header row against layout.RAW_COLUMNS
+    names = [c.strip() for c in cells]
+    if len(names) != len(RAW_COLUMNS):
+        return [Violation(None, 'columns', -1, 'Name',
+                          f"❌ Column mismatch: got {len(names)}, expected {len(RAW_COLUMNS)}\n")]
+    return [Violation(None, 'column name', -1, 'Name',
+                      f"❌ Column {i + 1} is '{got}', expected '{want}'\n")
+            for i, (got, want) in enumerate(zip(names, RAW_COLUMNS)) if got != want]
+
+
+def validate(lines):
+    # lines: text lines of one raw export. Yields Violations as they are found
+    reader = csv.reader(lines, delimiter=';')
+    next(reader, None)              # read_raw skips the first line
+
+    for cells in reader:
+        if cells and cells[0].strip() == 'Name':
+            header = check_header(cells)
+            yield from header
+            if header and header[0].kind == 'columns':
+                return
+            break
+    else:
+        yield Violation(None, 'header', -1, '', "❌ Could not find a row strictly equal to 'Name'.\n")
+        return
+
+    recent = deque(maxlen=WINDOW + 1)
+    row = 0
+    for cells in reader:
+        if not cells or not cells[0].strip().startswith('Raid '):
+            continue
+        cells = (cells + [''] * len(RAW_COLUMNS))[:len(RAW_COLUMNS)]
+        on = _set_flags(cells)
+        raid = _Raid(row, cells, on)
+        recent.append(raid)
+        row += 1
+
+        yield from _qc_1(raid, cells, on)
+        if len(recent) > WINDOW:
+            back = recent[0]
+            yield from _qc_4(back, raid)
+            yield from _qc_5(back, raid)
+            yield from _qc_6(back, raid)
+            yield from _qc_7(back, raid)
+        yield from _qc_11(raid)
+        yield from _qc_12(raid)
+        yield from _qc_26(raid, on)
+
+    if not recent:
+        yield Violation(None, 'raids', -1, '', "❌ No rows found strictly starting with 'Raid '.\n")
+
+
+def validate_file(path, out=None):
+    # Prints every violation to out (if given); returns a Counter of QC → violations
+    found = Counter()
+    with open(path, encoding='utf-8-sig', errors='replace', newline='') as f:
+        for v in validate(f):
+            found[v.qc] += 1
+            if out is not None:
+                print(f"  {v.line.strip()}", file=out)
+    return found
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Check raw Kabaddi exports for layout and single-raid QC problems.")
+    parser.add_argument('files', nargs='+')
+    args = parser.parse_args(argv)
+
+    failed = 0
+    for path in args.files:
+        print(path)
+        try:
+            found = validate_file(path, sys.stdout)
+        except OSError as e:
+            print(f"  ❌ {e}")
+            failed += 1
+            continue
+        if found:
+            failed += 1
+            summary = ', '.join(f"QC {qc}: {n}" if qc is not None else f"layout: {n}"
+                                for qc, n in sorted(found.items(), key=lambda x: -1 if x[0] is None else x[0]))
+            print(f"  → {sum(found.values())} problems ({summary})")
+        else:
+            print("  ✅ No problems found.")
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
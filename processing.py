@@ -0,0 +1,86 @@
+import io
+import time
+from collections import namedtuple
+
+from cache import CACHE
+from incremental import HISTORY, MatchVersion, process_match, restore_match
+from layout import match_number
+from metrics import METRICS, lap, observation
+from pipeline import ExportFormatError, PipelineError, TransformError, extract_raids, finalize, read_raw
+from qc import report
+
+
+# ---------------------------
+# Processing entry point (UI, batch, service)
+# ---------------------------
+# Reentrant: nothing is printed, no fixed file is written and no module state is swapped,
+# so several sessions can process at once and each gets its own result. The shared
+# history and cache are keyed by Match ID / file contents and are safe across threads.
+
+ProcessResult = namedtuple('ProcessResult', ['match_id', 'match_no', 'file_name', 'processed', 'report',
+                                             'version', 'delta', 'timings'])
+
+
+def process_export(content, match_id, engine="pandas", raw_df=None, cache=CACHE, history=HISTORY, timings=None):
+    # content: raw export bytes. raw_df: the same export already read with read_raw (optional)
+    # Returns (MatchVersion, Delta or None), see incremental.py. timings: dict that gets the
+    # seconds spent per stage added (optional)
+
+    # ------ Unchanged export: read it back from the cache ------
+    start = time.perf_counter()
+    cached = None
+    if cache is not None:
+        cached = cache.get(content, match_id)
+        start = lap(timings, 'cache', start)
+    if cached is not None:
+        version = MatchVersion(None, cached.fingerprints, cached.processed, cached.violations,
+                               cached.flags, cached.teams)
+        return version, restore_match(match_id, version, history)
+
+    # ------ Parse, transform & QC (only edited rows when re-uploaded) ------
+    if raw_df is None:
+        try:
+            raw_df = read_raw(io.BytesIO(content))
+        except ValueError as e:
+            raise ExportFormatError(f"❌ Could not read the export: {e}") from e
+    raw = extract_raids(raw_df)
+    lap(timings, 'parse', start)
+    try:
+        version, delta = process_match(raw, match_id, engine=engine, history=history, timings=timings)
+    except PipelineError:
+        raise
+    except (ValueError, TypeError, KeyError, AttributeError, IndexError) as e:
+        raise TransformError(f"❌ An error occurred: {e}") from e
+
+    if cache is not None:
+        start = time.perf_counter()
+        cache.put(content, match_id, version)
+        lap(timings, 'cache', start)
+    return version, delta
+
+
+def process_upload(content, match_id, engine="pandas", raw_df=None, cache=CACHE, history=HISTORY,
+                   metrics=METRICS):
+    # Everything the page shows for one upload: the saved CSV frame, the QC log and the delta.
+    # The upload is recorded in metrics (see metrics.py) unless it is None
+    timings = {}
+    begin = time.perf_counter()
+    try:
+        version, delta = process_export(content, match_id, engine=engine, raw_df=raw_df, cache=cache,
+                                        history=history, timings=timings)
+    except PipelineError:
+        if metrics is not None:
+            metrics.record_failure(engine)
+        raise
+    start = time.perf_counter()
+    processed = finalize(version.processed)
+    lap(timings, 'finalize', start)
+    text = report(version.violations)
+    lap(timings, 'total', begin)
+
+    match_no = match_number(match_id)
+    result = ProcessResult(match_id, match_no, f"tagged_{match_no}_{match_id}.csv", processed, text,
+                           version, delta, timings)
+    if metrics is not None:
+        metrics.record(observation(result, engine))
+    return result
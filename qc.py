@@ -0,0 +1,713 @@
+import numpy as np
+import pandas as pd
+from collections import namedtuple
+
+from layout import FLAG_COLUMNS, ONE_HOT_GROUPS, EXACTLY_ONE, ANY
+from lineup import LINEUP_COLS, track
+from pipeline import finalize
+from timeline import clock, intervals
+
+
+# ---------------------------
+# Quality Checks
+# ---------------------------
+# Every check returns Violation records instead of printing, so the log can be
+# rebuilt from any mix of old and freshly checked rows (see incremental.py).
+#
+#   qc    : QC number (1-29)
+#   kind  : sub-check within a QC (None when the QC has only one)
+#   row   : index of the row the check was evaluated on (its anchor)
+#   event : Event_Number the message points at
+#   line  : exact text the QC log shows for this violation
+
+Violation = namedtuple('Violation', ['qc', 'kind', 'row', 'event', 'line'])
+Check = namedtuple('Check', ['qc', 'kinds', 'func', 'passed', 'group'])
+
+# Checks that look at rows ±2 away from the row being checked
+WINDOW = 2
+
+ATTACKING_POINT_COLS = ['Raiding_Touch_Points', 'Raiding_Bonus_Points', 'Raiding_Self_Out_Points', 'Raiding_All_Out_Points']
+DEFENDING_POINT_COLS = ['Defending_Capture_Points', 'Defending_Bonus_Points', 'Defending_Self_Out_Points', 'Defending_All_Out_Points']
+
+
+def message(v):
+    return v.line.strip()
+
+
+# QC 1: Empty Columns (Robust Version)
+
+QC1_COLS = [
+    'Raid_Length', 'Outcome', 'Bonus', 'All_Out',
+    'Raid_Number', 'Raider_Name', 'Number_of_Defenders', 'Tie_Break_Raids'
+]
+
+
+def _is_blank(val):
+    if pd.isna(val):               # NaN values
+        return True
+    val_str = str(val).strip()     # Convert to string and strip whitespace
+    if val_str == '' or val_str.lower() in ['na', 'nan']:  # Empty or placeholders
+        return True
+    return False
+
+
+def qc_1(df, sub):
+    mask = sub[QC1_COLS].map(_is_blank)
+    out = []
+    for idx, row in sub[mask.any(axis=1)].iterrows():
+        empty_cols = mask.loc[idx][mask.loc[idx]].index.tolist()
+        out.append(Violation(1, None, idx, row['Event_Number'],
+                             f"\n❌ {row['Event_Number']}: Empty in columns → {', '.join(empty_cols)}. Please check and update.\n"))
+    return out
+
+
+# QC 2: Whem Outcome = Empty These Columns must be Empty.
+
+QC2_COLS = ['Defender_1_Name', 'Defender_2_Name', 'Defender_3_Name', 'Defender_4_Name', 'Defender_5_Name', 'Defender_6_Name',
+            'Defender_7_Name', 'Attacking_Skill', 'Defensive_Skill', 'Counter_Action_Skill', 'Zone_of_Action','Defender_Position', 'QoD_Skill']
+
+
+def qc_2(df, sub):
+    cols_empty = sub[QC2_COLS].replace('', pd.NA).isna().all(axis=1)
+    invalid = (
+        (sub['Outcome'] == 'Empty') & ~(
+            cols_empty &
+            (sub['All_Out'] == 0) &
+            (sub['Raiding_Team_Points'] == 0) &
+            (sub['Defending_Team_Points'] == 0) &
+            (sub['Bonus'] == 'No')
+        )
+    )
+    out = []
+    for idx, row in sub[invalid].iterrows():
+        issues = []
+
+        non_empty_cols = row[QC2_COLS].replace('', pd.NA).dropna().index.tolist()
+        if non_empty_cols:
+            issues.append(f"these columns should be empty: {', '.join(non_empty_cols)}")
+
+        if row['All_Out'] != 0:
+            issues.append(f"All_Out should be 0 (is {row['All_Out']})")
+        if row['Raiding_Team_Points'] != 0:
+            issues.append(f"Raiding_Team_Points should be 0 (is {row['Raiding_Team_Points']})")
+        if row['Defending_Team_Points'] != 0:
+            issues.append(f"Defending_Team_Points should be 0 (is {row['Defending_Team_Points']})")
+        if row['Bonus'] != 'No':
+            issues.append(f"Bonus should be 'No' (is '{row['Bonus']}')")
+
+        issue_string = '; '.join(issues)
+        out.append(Violation(2, None, idx, row['Event_Number'],
+                             f"❌ {row['Event_Number']}: → When Outcome is 'Empty', → {issue_string}.\n"))
+    return out
+
+
+# QC 3: Successful / Unsuccessful with Bonus = No & Raider_Self_Out = 0
+
+QC3_COLS = ['Defender_1_Name', 'Number_of_Defenders', 'Zone_of_Action']
+
+
+def qc_3(df, sub):
+    non_empty_outcomes = (
+        sub['Outcome'].isin(['Successful', 'Unsuccessful'])
+    ) & (sub['Bonus'] == 'No') & (sub['Raider_Self_Out'] == 0)
+    cols_filled = sub[QC3_COLS].replace('', pd.NA).notna().all(axis=1)
+    out = []
+    for idx, row in sub[non_empty_outcomes & ~cols_filled].iterrows():
+        empty_cols = row[QC3_COLS].replace('', pd.NA).isna()
+        missing_cols = empty_cols[empty_cols].index.tolist()
+        out.append(Violation(3, None, idx, row['Event_Number'],
+                             f"❌ {row['Event_Number']}: When Outcome='{row['Outcome']}', Bonus='No', Raider_Self_Out = 'No' → Missing: {', '.join(missing_cols)}.\n"))
+    return out
+
+
+# QC 4: If Raid_Number = 3 then row at index -2 must have Outcome == 'Empty'
+
+def qc_4(df, sub):
+    out = []
+    for idx, row in sub.iterrows():
+        if row['Raid_Number'] == 3:
+            target_idx = idx - 2
+            # Only check if index - 2 exists
+            if target_idx >= 0 and df.loc[target_idx, 'Outcome'] != 'Empty':
+                out.append(Violation(4, None, idx, df.loc[target_idx, 'Event_Number'],
+                                     f"❌ {df.loc[target_idx, 'Event_Number']}: → Outcome must be 'Empty' "
+                                     f"(Because {row['Event_Number']} has Raid_Number = 3)\n"))
+    return out
+
+
+# QC 5: If Raid_Number = 1 & Outcome = 'Empty', then row at index +2 must have Raid_Number = 2
+
+def qc_5(df, sub):
+    out = []
+    for idx, row in sub.iterrows():
+        if (row['Raid_Number'] == 1) and (row['Outcome'] == 'Empty'):
+            target_idx = idx + 2
+            if target_idx < len(df) and df.loc[target_idx, 'Raid_Number'] != 2:
+                out.append(Violation(5, None, idx, df.loc[target_idx, 'Event_Number'],
+                                     f"❌ {df.loc[target_idx, 'Event_Number']}: → Raid_Number must be = 2 "
+                                     f"(Because {row['Event_Number']} Raid_Number is 1)\n"))
+    return out
+
+
+# QC 6: If Outcome = 'Successful or Unsuccessful', then row at index +2 must have Raid_Number = 1
+
+def qc_6(df, sub):
+    out = []
+    for i in sub.index:
+        outcome = str(df.loc[i, 'Outcome']).strip().lower()
+
+        # Rule: If Outcome is 'Successful' or 'Unsuccessful'
+        if outcome in ('successful', 'unsuccessful'):
+            target = i + 2
+
+            # If we are at the end of the DataFrame (no row +2), just skip
+            if target >= len(df):
+                continue
+
+            # If Raid_Number is not 1, this is a violation
+            if df.loc[target, 'Raid_Number'] != 1:
+                out.append(Violation(6, None, i, df.loc[target, 'Event_Number'],
+                                     f"❌ {df.loc[target, 'Event_Number']}: → Raid_Number must be = 1 "
+                                     f"(Because {df.loc[i, 'Event_Number']} has Outcome = {df.loc[i, 'Outcome']})\n"))
+    return out
+
+
+# QC 7: if Raid_Number = 2 & Outcome = 'Empty', then row at index -2 must have Raid_Number = 1 & Outcome = 'Empty'
+
+def qc_7(df, sub):
+    out = []
+    for idx, row in sub.iterrows():
+        if row['Raid_Number'] == 2 and row['Outcome'] == 'Empty' and idx >= 2:
+            prev_row = df.loc[idx - 2]
+
+            # Check if either condition fails
+            if prev_row['Raid_Number'] != 1 or prev_row['Outcome'] != 'Empty':
+                out.append(Violation(7, None, idx, row['Event_Number'],
+                                     f"❌ {row['Event_Number']} is Empty, but {prev_row['Event_Number']} has {prev_row['Raid_Number']} Raid Number and Outcome='{prev_row['Outcome']}'\n"))
+    return out
+
+
+# QC 8: Attacking & Defensive Points match
+
+def _points_match(cols, total_col, label):
+    def check(df, sub):
+        mismatch = sub[cols].sum(axis=1) != sub[total_col]
+        return [Violation(8, label, idx, row['Event_Number'],
+                          f"❌ {row['Event_Number']}: → {label} mismatch (Expected: {sub.loc[idx, cols].sum()}, Found: {row[total_col]})\n")
+                for idx, row in sub[mismatch].iterrows()]
+    return check
+
+
+# QC 9: Outcome == Successful/Unsuccessful must have points
+
+def _points_nonzero(outcome, cols, team_name):
+    def check(df, sub):
+        outcome_mask = sub['Outcome'].eq(outcome)
+        zero_points = sub[cols].fillna(0).sum(axis=1).eq(0)
+        problem = sub.loc[outcome_mask & zero_points, 'Event_Number'].astype(str)
+        return [Violation(9, team_name, idx, raid_no,
+                          f"❌ {team_name}: Raid {raid_no} — Outcome is '{outcome}', but no points were given.\n")
+                for idx, raid_no in problem.items()]
+    return check
+
+
+# QC 10: Defending_Self_Out_Points > 1
+
+def qc_10(df, sub):
+    mismatch = sub['Defending_Self_Out_Points'] > 1
+    events = sub.loc[mismatch, 'Event_Number'].astype(str)
+    return [Violation(10, None, idx, event, "❌ " + event + "  Check 'Raider self out'\n")
+            for idx, event in events.items()]
+
+
+# QC 11: Raid_Length should be > 2
+
+def qc_11(df, sub):
+    return [Violation(11, None, idx, row['Event_Number'], f"⚠️ {row['Event_Number']}: Raid_Length is {row['Raid_Length']}\n")
+            for idx, row in sub[sub['Raid_Length'] <= 2].iterrows()]
+
+
+# QC 12: Number_of_Defenders should be > 0
+
+def qc_12(df, sub):
+    return [Violation(12, None, idx, row['Event_Number'],
+                      f"❌ {row['Event_Number']}: Number_of_Defenders is --> {row['Number_of_Defenders']}, Check \n")
+            for idx, row in sub[sub['Number_of_Defenders'] <= 0].iterrows()]
+
+
+# QC 13: Successful, No Bonus, No Defenders Self Out all 3 skills
+
+def qc_13(df, sub):
+    fil_df = sub[
+        (sub['Outcome'] == 'Successful') &
+        (sub['Bonus'] == 'No') &
+        (sub['Number_of_Defenders_Self_Out'] == 0)
+    ].copy()
+
+    # Replace empty strings with NA
+    for col in ['Attacking_Skill', 'Defensive_Skill', 'Counter_Action_Skill']:
+        fil_df[col] = fil_df[col].replace('', pd.NA)
+
+    # Existing conditions
+    cond1 = (fil_df['Attacking_Skill'].isna() &
+            (fil_df['Defensive_Skill'].isna() | fil_df['Counter_Action_Skill'].isna()))
+    cond2 = (fil_df['Attacking_Skill'].notna() &
+            (fil_df['Defensive_Skill'].notna() | fil_df['Counter_Action_Skill'].notna()))
+
+    # New condition: all three skills empty
+    cond_all_empty = (fil_df['Attacking_Skill'].isna() &
+                    fil_df['Defensive_Skill'].isna() &
+                    fil_df['Counter_Action_Skill'].isna())
+
+    out = [Violation(13, 'skills', idx, event,
+                     f"⚠️ {event}: 'Attacking_Skill' & 'Defensive & Counter_Action_Skill' - all 3 Present Check once.\n")
+           for idx, event in fil_df.loc[cond1 | cond2, 'Event_Number'].items()]
+    out += [Violation(13, 'empty', idx, event, f"❌ {event}: All three skill columns are empty. Please check.\n")
+            for idx, event in fil_df.loc[cond_all_empty, 'Event_Number'].items()]
+    return out
+
+
+# QC 14: Outcome = Unsuccessful -> Defensive_Skill must NOT be empty
+
+def qc_14(df, sub):
+    violations = sub[
+        (sub['Outcome'] == 'Unsuccessful') &
+        (sub['Defensive_Skill'].isna() | (sub['Defensive_Skill'].str.strip() == ''))
+    ]
+    return [Violation(14, None, idx, row['Event_Number'],
+                      f"❌ {row['Event_Number']}: Outcome is 'Unsuccessful' and 'Defensive_Skill' is empty.\n")
+            for idx, row in violations.iterrows()]
+
+
+# QC 15: Outcome = Successful & Bonus = No -> Defensive_Skill & Counter_Action_Skill both must NOT be empty or both must be empty
+
+def _is_empty(cell):
+    return pd.isna(cell) or str(cell).strip() == ''
+
+
+def qc_15(df, sub):
+    # Base filter, with the mandatory Raiding_Touch_Points condition
+    mask = (sub['Outcome'] == 'Successful') & (sub['Bonus'] == 'No') & (sub['Raiding_Touch_Points'] > 0)
+    filtered = sub[mask]
+
+    # Find violations where one column is empty but not the other
+    def_empty = filtered['Defensive_Skill'].apply(_is_empty).astype(bool)
+    ca_empty = filtered['Counter_Action_Skill'].apply(_is_empty).astype(bool)
+    violations = filtered[(def_empty & ~ca_empty) | (~def_empty & ca_empty)]
+    return [Violation(15, None, idx, row['Event_Number'],
+                      f"❌ {row['Event_Number']}: 'Defensive_Skill' or 'Counter_Action_Skill' missing.\n")
+            for idx, row in violations.iterrows()]
+
+
+# QC 16: Defender without Position & Position with Defenders
+
+def qc_16(df, sub):
+    failed_1 = sub[(sub["Defender_1_Name"].notna()) & (sub["Defender_Position"].isna() | (sub["Defender_Position"] == ""))]
+    failed_2 = sub[(sub["Defender_1_Name"].isna()) & (sub["Defender_Position"].notna()) & (sub["Defender_Position"] != "")]
+    out = [Violation(16, 'no position', idx, event, f"❌ {event}: Defender(s) present but 'Defender_Position' is empty.\n")
+           for idx, event in failed_1['Event_Number'].items()]
+    out += [Violation(16, 'no defender', idx, event, f"❌ {event}: 'Defender_Position' present but Defender(s) is empty.\n")
+            for idx, event in failed_2['Event_Number'].items()]
+    return out
+
+
+# QC 17: Defensive_Skill & QoD_Skill Alignment
+
+EXCLUDED_SKILLS = ["Defender self out", "Raider self out"]
+
+
+def qc_17(df, sub):
+    # Type 1: Defensive_Skill present (not excluded) but QoD_Skill missing
+    type_1 = sub[
+        (sub["Outcome"] == "Unsuccessful") &
+        (sub["Defensive_Skill"].fillna("").str.strip() != "") &
+        (~sub["Defensive_Skill"].isin(EXCLUDED_SKILLS)) &
+        (sub["QoD_Skill"].fillna("").str.strip() == "")
+    ]
+
+    # Type 2: QoD_Skill present but Defensive_Skill missing
+    type_2 = sub[
+        (sub["Outcome"] == "Unsuccessful") &
+        (sub["QoD_Skill"].fillna("").str.strip() != "") &
+        (sub["Defensive_Skill"].fillna("").str.strip() == "")
+    ]
+
+    out = [Violation(17, 'Type 1', idx, event, f"❌ [Type 1]: {event} → Defensive_Skill present but QoD_Skill missing.\n")
+           for idx, event in type_1['Event_Number'].items()]
+    out += [Violation(17, 'Type 2', idx, event, f"❌ [Type 2]: {event} → QoD_Skill present but Defensive_Skill missing.\n")
+            for idx, event in type_2['Event_Number'].items()]
+    return out
+
+
+# QC 18: Bonus & Type of Bonus
+
+def qc_18(df, sub):
+    condition_1 = (sub['Bonus'] == 'Yes') & ((sub['Type_of_Bonus'] == '') | (sub['Type_of_Bonus'].isnull()))
+    condition_2 = (sub['Bonus'] == 'No') & ((sub['Type_of_Bonus'] != '') & (~sub['Type_of_Bonus'].isnull()))
+    out = []
+    for idx, row in sub[condition_1 | condition_2].iterrows():
+        if row['Bonus'] == 'Yes' and (row['Type_of_Bonus'] == '' or pd.isnull(row['Type_of_Bonus'])):
+            out.append(Violation(18, None, idx, row['Event_Number'],
+                                 f"❌ {row['Event_Number']}: Bonus is 'Yes' but Type_of_Bonus is missing or empty.\n"))
+
+        elif row['Bonus'] == 'No' and (row['Type_of_Bonus'] != '' and not pd.isnull(row['Type_of_Bonus'])):
+            out.append(Violation(18, None, idx, row['Event_Number'],
+                                 f"❌ {row['Event_Number']}: Bonus is 'No' but Type_of_Bonus should be null.\n"))
+    return out
+
+
+# QC 19: When Outcome = 'Successful' or 'Unsuccessful', Zone_of_Action must not be empty
+
+def qc_19(df, sub):
+    empty_zone = sub[sub['Outcome'].isin(['Successful', 'Unsuccessful']) & sub['Zone_of_Action'].isna()]
+    return [Violation(19, None, idx, row['Event_Number'], f"❌ {row['Event_Number']}: →  Zone_of_Action is empty.\n")
+            for idx, row in empty_zone.iterrows()]
+
+
+# QC 20: When ['Defensive_Skill'] == 'Raider self out' these below 4 columns must be empty
+
+QC20_COLS = ['QoD_Skill', 'Defender_1_Name', 'Defender_Position', 'Counter_Action_Skill']
+
+
+def qc_20(df, sub):
+    mask = sub['Defensive_Skill'] == 'Raider self out'
+
+    # Skip rows where Attacking_Skill == 'Defender self out' AND Defensive_Skill == 'Raider self out'
+    check_mask = mask & ~(mask & (sub['Attacking_Skill'] == 'Defender self out'))
+
+    filled = (sub[QC20_COLS].notna() & (sub[QC20_COLS] != '')).any(axis=1)
+    out = []
+    for idx, row in sub[check_mask & filled].iterrows():
+        # Identify which of the 4 columns have values
+        non_empty_cols = [col for col in QC20_COLS if pd.notna(row[col]) and row[col] != '']
+        out.append(Violation(20, None, idx, row['Event_Number'],
+                             f"❌ {row['Event_Number']}: Found values in {', '.join(non_empty_cols)} — these must be empty when Defensive_Skill = 'Raider self out'.\n"))
+    return out
+
+
+# QC 21: When Outcome = 'Successful', Bonus = 'Yes', and Raiding_Team_Points = 1, all skill columns must be empty.
+
+QC21_COLS = ['Attacking_Skill', 'Defensive_Skill', 'QoD_Skill', 'Counter_Action_Skill']
+
+
+def qc_21(df, sub):
+    filtered = sub[
+        (sub['Outcome'] == 'Successful') &
+        (sub['Bonus'] == 'Yes') &
+        (sub['Raiding_Team_Points'] == 1)]
+    out = []
+    for idx, row in filtered.iterrows():
+        for col in QC21_COLS:
+            # Treat empty strings as NaN
+            if not (pd.isna(row[col]) or row[col] == ''):
+                out.append(Violation(21, None, idx, row['Event_Number'],
+                                     f"❌ {row['Event_Number']}: When Outcome='Successful', Bonus='Yes', and Raiding_Team_Points=1, "
+                                     f"all skill columns must be empty. But '{col}' has value '{row[col]}'.\n"))
+    return out
+
+
+# QC 22: QoD_Skill & Outcome Alignment Check
+
+def qc_22(df, sub):
+    # A value is considered "present" if the cell is not null, empty, or just whitespace.
+    is_def_skill_present = sub["Defensive_Skill"].fillna("").str.strip() != ""
+    is_qod_skill_present = sub["QoD_Skill"].fillna("").str.strip() != ""
+    is_successful = sub['Outcome'] == 'Successful'
+
+    # Type 1: QoD_Skill is present, but Defensive_Skill is missing.
+    type_1 = sub.loc[is_qod_skill_present & ~is_def_skill_present, 'Event_Number']
+    # Type 2: Raid is Successful, but QoD_Skill is present.
+    type_2 = sub.loc[is_successful & is_qod_skill_present, 'Event_Number']
+
+    out = [Violation(22, 'Type 1', idx, event, f"❌ {event} → QoD_Skill present but Defensive_Skill missing.\n")
+           for idx, event in type_1.items()]
+    out += [Violation(22, 'Type 2', idx, event, f"❌ {event} → Raid is Successful but QoD_Skill is present, should be None.\n")
+            for idx, event in type_2.items()]
+    return out
+
+
+# QC 23-25: Raid timing on the match video (Start → Video_Link, Stop - Start → Time)
+
+MAX_GAP_SECS = 300
+
+
+def _timing(df, sub):
+    # Start/stop of each checked row and of the raid logged before it
+    start, stop = intervals(df)
+    return pd.DataFrame({
+        'event': df['Event_Number'], 'start': start, 'stop': stop,
+        'prev_event': df['Event_Number'].shift(), 'prev_start': start.shift(), 'prev_stop': stop.shift(),
+    }).loc[sub.index]
+
+
+# QC 23: Raids must follow each other in video time without overlapping
+
+def qc_23(df, sub):
+    t = _timing(df, sub)
+    order = t['start'] < t['prev_start']
+    overlap = ~order & (t['start'] < t['prev_stop'])
+    out = [Violation(23, 'order', idx, r.event,
+                     f"❌ {r.event}: Starts at {clock(r.start)}, before the previous raid {r.prev_event} ({clock(r.prev_start)}).\n")
+           for idx, r in t[order].iterrows()]
+    out += [Violation(23, 'overlap', idx, r.event,
+                      f"❌ {r.event}: Starts at {clock(r.start)} while the previous raid {r.prev_event} runs until {clock(r.prev_stop)}.\n")
+            for idx, r in t[overlap].iterrows()]
+    return out
+
+
+# QC 24: Stop must not be before Start
+
+def qc_24(df, sub):
+    t = _timing(df, sub)
+    return [Violation(24, None, idx, r.event, f"❌ {r.event}: Stop {clock(r.stop)} is before Start {clock(r.start)}.\n")
+            for idx, r in t[t['stop'] < t['start']].iterrows()]
+
+
+# QC 25: Long gaps between raids usually mean a raid was not tagged
+
+def qc_25(df, sub):
+    t = _timing(df, sub)
+    gap = t['start'] - t['prev_stop']
+    return [Violation(25, None, idx, r.event,
+                      f"❌ {r.event}: {clock(gap[idx])} gap after the previous raid {r.prev_event}. Please check for a missing raid.\n")
+            for idx, r in t[gap > MAX_GAP_SECS].iterrows()]
+
+
+# QC 26: One-hot flag groups must have as many flags set as declared (layout.ONE_HOT_GROUPS)
+
+CARDINALITY_GROUPS = [group for group, (_, card) in ONE_HOT_GROUPS.items() if card != ANY]
+
+# FLAG_COLUMNS x groups membership, so one matrix product counts every group of every row
+GROUP_MATRIX = np.zeros((len(FLAG_COLUMNS), len(CARDINALITY_GROUPS)), dtype=np.int32)
+for _j, _group in enumerate(CARDINALITY_GROUPS):
+    GROUP_MATRIX[[FLAG_COLUMNS.index(c) for c in ONE_HOT_GROUPS[_group][0]], _j] = 1
+GROUP_MIN = np.array([ONE_HOT_GROUPS[g][1][0] for g in CARDINALITY_GROUPS])
+GROUP_MAX = np.array([ONE_HOT_GROUPS[g][1][1] for g in CARDINALITY_GROUPS])
+
+
+def qc_26(df, sub, flags):
+    # flags: raw flag matrix of df (raid rows x FLAG_COLUMNS)
+    rows = sub.index.to_numpy()
+    counts = flags[rows].astype(np.int32) @ GROUP_MATRIX
+    bad = (counts < GROUP_MIN) | (counts > GROUP_MAX)
+
+    out = []
+    for i, j in zip(*np.nonzero(bad)):
+        idx, group = rows[i], CARDINALITY_GROUPS[j]
+        cols, card = ONE_HOT_GROUPS[group]
+        event = sub.at[idx, 'Event_Number']
+        found = [c for c in cols if flags[idx, FLAG_COLUMNS.index(c)]]
+        expected = 'exactly one' if card == EXACTLY_ONE else 'at most one'
+        out.append(Violation(26, group, int(idx), event,
+                             f"❌ {event}: {group} flags set → {', '.join(found) or 'none'}. Expected {expected}.\n"))
+    return out
+
+
+# QC 27-29: Tags against the players on court (lineup.py); lineup is track() of the whole match
+
+def _tracked(sub, lineup):
+    rows = sub.index.to_numpy()
+    return rows[lineup.tracked[rows]]
+
+
+# QC 27: Number_of_Defenders must match the defending side's players on court
+
+def qc_27(df, sub, lineup):
+    out = []
+    for idx in _tracked(sub, lineup):
+        tagged = sub.at[idx, 'Number_of_Defenders']
+        if tagged != lineup.defenders[idx]:
+            event = sub.at[idx, 'Event_Number']
+            out.append(Violation(27, None, int(idx), event,
+                                 f"❌ {event}: Number_of_Defenders is {tagged}, but {lineup.defending_team[idx]} "
+                                 f"should have {lineup.defenders[idx]} on court.\n"))
+    return out
+
+
+# QC 28: All_Out must be 1 exactly when a side has nobody left
+
+def qc_28(df, sub, lineup):
+    out = []
+    for idx in _tracked(sub, lineup):
+        tagged = sub.at[idx, 'All_Out']
+        event = sub.at[idx, 'Event_Number']
+        if lineup.all_out[idx] and tagged != 1:
+            side = lineup.defending_team[idx] if lineup.raiding_all_out_points[idx] else lineup.raiding_team[idx]
+            out.append(Violation(28, 'missing', int(idx), event,
+                                 f"❌ {event}: {side} has no players left after this raid, but All_Out is {tagged}.\n"))
+        elif not lineup.all_out[idx] and tagged == 1:
+            out.append(Violation(28, 'unexpected', int(idx), event,
+                                 f"❌ {event}: All_Out is 1, but {lineup.raiding_team[idx]} has {lineup.raiders_left[idx]} "
+                                 f"and {lineup.defending_team[idx]} has {lineup.defenders_left[idx]} players left.\n"))
+    return out
+
+
+# QC 29: All-out points must follow the players on court
+
+def _all_out_points(col, field, label):
+    def check(df, sub, lineup):
+        out = []
+        for idx in _tracked(sub, lineup):
+            found, expected = sub.at[idx, col], getattr(lineup, field)[idx]
+            if found != expected:
+                event = sub.at[idx, 'Event_Number']
+                out.append(Violation(29, label, int(idx), event,
+                                     f"❌ {event}: {col} is {found}, expected {expected}.\n"))
+        return out
+    return check
+
+
+# ---------------------------
+# Check Registry (log order)
+# ---------------------------
+# group: kind → one log line listing every event of that kind (None: one line per violation)
+
+CHECKS = [
+    Check(1, (None,), qc_1, "\nQC 1: ✅ All rows are completely filled.\n", None),
+    Check(2, (None,), qc_2, "QC 2: ✅ All rows meet conditions for Outcome = 'Empty'.\n", None),
+    Check(3, (None,), qc_3, "QC 3: ✅ All rows are Valid.\n", None),
+    Check(4, (None,), qc_4, "QC 4: ✅ All rows are Valid.\n", None),
+    Check(5, (None,), qc_5, "QC 5: ✅ All rows are Valid.\n", None),
+    Check(6, (None,), qc_6, "QC 6: ✅ All rows are Valid.\n", None),
+    Check(7, (None,), qc_7, "QC 7: ✅ All rows are correct.\n", None),
+    Check(8, ('Attacking Points',), _points_match(ATTACKING_POINT_COLS, 'Raiding_Team_Points', 'Attacking Points'),
+          "QC 8: ✅ All rows are correct for Attacking Points\n", None),
+    Check(8, ('Defensive Points',), _points_match(DEFENDING_POINT_COLS, 'Defending_Team_Points', 'Defensive Points'),
+          "QC 8: ✅ All rows are correct for Defensive Points\n", None),
+    Check(9, ('Raiding',), _points_nonzero('Successful', ATTACKING_POINT_COLS, 'Raiding'),
+          "QC 9: ✅ All Raiding (Successful) rows are correct.\n", None),
+    Check(9, ('Defending',), _points_nonzero('Unsuccessful', DEFENDING_POINT_COLS, 'Defending'),
+          "QC 9: ✅ All Defending (Unsuccessful) rows are correct.\n", None),
+    Check(10, (None,), qc_10, "QC 10: ✅ All rows are correct.\n", None),
+    Check(11, (None,), qc_11, "QC 11: ✅ All rows have valid Raid_Length values.\n", None),
+    Check(12, (None,), qc_12, "QC 12: ✅ All rows have valid Number_of_Defenders values.\n", None),
+    Check(13, ('skills', 'empty'), qc_13, "QC 13: ✅ All rows are correct.\n", None),
+    Check(14, (None,), qc_14, "QC 14: ✅ All rows are correct.\n", None),
+    Check(15, (None,), qc_15, "QC 15: ✅ All rows are correct.\n", None),
+    Check(16, ('no position', 'no defender'), qc_16, "QC 16: ✅ All defender-position mappings are consistent.\n", None),
+    Check(17, ('Type 1', 'Type 2'), qc_17, "QC 17: ✅ Defensive_Skill and QoD_Skill are aligned correctly.\n", {
+        'Type 1': "❌ [Type 1]: {events} → Defensive_Skill present but QoD_Skill missing.\n",
+        'Type 2': "❌ [Type 2]: {events} → QoD_Skill present but Defensive_Skill missing.\n"}),
+    Check(18, (None,), qc_18, "QC 18: ✅ All rows are correct!\n", None),
+    Check(19, (None,), qc_19, " QC 19: ✅ All rows meet conditions for Outcome = 'Successful' or 'Unsuccessful'.\n", None),
+    Check(20, (None,), qc_20, "QC 20: ✅ All rows are correct.\n", None),
+    Check(21, (None,), qc_21, "QC 21: ✅ All rows are correct.\n", None),
+    Check(22, ('Type 1', 'Type 2'), qc_22, "QC 22: ✅ All skill and outcome alignments are correct.\n", {
+        'Type 1': "❌ {events} → QoD_Skill present but Defensive_Skill missing.\n",
+        'Type 2': "❌ {events} → Raid is Successful but QoD_Skill is present, should be None.\n"}),
+    Check(23, ('order', 'overlap'), qc_23, "QC 23: ✅ All raids are in video order without overlaps.\n", None),
+    Check(24, (None,), qc_24, "QC 24: ✅ All raids stop after they start.\n", None),
+    Check(25, (None,), qc_25, f"QC 25: ✅ No gaps over {MAX_GAP_SECS // 60} minutes between raids.\n", None),
+    Check(26, tuple(CARDINALITY_GROUPS), qc_26, "QC 26: ✅ Every flag group has a valid number of flags set.\n", None),
+    Check(27, (None,), qc_27, "QC 27: ✅ Number_of_Defenders follows the players on court.\n", None),
+    Check(28, ('missing', 'unexpected'), qc_28, "QC 28: ✅ All_Out follows the players on court.\n", None),
+    Check(29, ('Raiding',), _all_out_points('Raiding_All_Out_Points', 'raiding_all_out_points', 'Raiding'),
+          "QC 29: ✅ Raiding_All_Out_Points follow the players on court.\n", None),
+    Check(29, ('Defending',), _all_out_points('Defending_All_Out_Points', 'defending_all_out_points', 'Defending'),
+          "QC 29: ✅ Defending_All_Out_Points follow the players on court.\n", None),
+]
+
+# Checks that read the raw flag matrix instead of the transformed columns
+FLAG_CHECKS = {26}
+
+# Checks that follow the players on court over the whole match (lineup.py): they need the
+# raiding team of every raid, and any edited raid can change their result for every later one
+LINEUP_CHECKS = {27, 28, 29}
+
+# Transformed columns each QC reads besides Event_Number (stages.py computes only these)
+TIMING_COLS = ['Video_Link', 'Time']
+QC_COLUMNS = {
+    1: QC1_COLS,
+    2: ['Outcome', 'All_Out', 'Raiding_Team_Points', 'Defending_Team_Points', 'Bonus', *QC2_COLS],
+    3: ['Outcome', 'Bonus', 'Raider_Self_Out', *QC3_COLS],
+    4: ['Raid_Number', 'Outcome'],
+    5: ['Raid_Number', 'Outcome'],
+    6: ['Raid_Number', 'Outcome'],
+    7: ['Raid_Number', 'Outcome'],
+    8: [*ATTACKING_POINT_COLS, 'Raiding_Team_Points', *DEFENDING_POINT_COLS, 'Defending_Team_Points'],
+    9: ['Outcome', *ATTACKING_POINT_COLS, *DEFENDING_POINT_COLS],
+    10: ['Defending_Self_Out_Points'],
+    11: ['Raid_Length'],
+    12: ['Number_of_Defenders'],
+    13: ['Outcome', 'Bonus', 'Number_of_Defenders_Self_Out', 'Attacking_Skill', 'Defensive_Skill', 'Counter_Action_Skill'],
+    14: ['Outcome', 'Defensive_Skill'],
+    15: ['Outcome', 'Bonus', 'Raiding_Touch_Points', 'Defensive_Skill', 'Counter_Action_Skill'],
+    16: ['Defender_1_Name', 'Defender_Position'],
+    17: ['Outcome', 'Defensive_Skill', 'QoD_Skill'],
+    18: ['Bonus', 'Type_of_Bonus'],
+    19: ['Outcome', 'Zone_of_Action'],
+    20: ['Defensive_Skill', 'Attacking_Skill', *QC20_COLS],
+    21: ['Outcome', 'Bonus', 'Raiding_Team_Points', *QC21_COLS],
+    22: ['Outcome', 'Defensive_Skill', 'QoD_Skill'],
+    23: TIMING_COLS,
+    24: TIMING_COLS,
+    25: TIMING_COLS,
+    26: [],
+    27: LINEUP_COLS,
+    28: LINEUP_COLS,
+    29: LINEUP_COLS,
+}
+
+
+def _by_check(violations):
+    # (check, its violations ordered by kind then row); stable, so several
+    # violations of one row keep the order the check emitted them in
+    buckets = {}
+    for v in violations:
+        buckets.setdefault((v.qc, v.kind), []).append(v)
+    for check in CHECKS:
+        owned = []
+        for kind in check.kinds:
+            owned += sorted(buckets.get((check.qc, kind), ()), key=lambda v: v.row)
+        yield check, owned
+
+
+def sort_violations(violations):
+    # Log order: check by check, then kind, then row
+    return [v for _, owned in _by_check(violations) for v in owned]
+
+
+def run_qcs(df, flags, rows=None, qcs=None, teams=None):
+    # df: transformed frame (RangeIndex). flags: its raw flag matrix (pipeline.flag_matrix)
+    # rows: only check these row indexes (default: all)
+    # qcs: only run these QC numbers (default: all); df then only needs their QC_COLUMNS
+    # teams: raiding team of every raid (incremental.raiding_teams); without it the
+    #        LINEUP_CHECKS are skipped
+    rows = df.index if rows is None else pd.Index(sorted(set(rows)))
+    raw_sub = df.loc[rows]
+
+    # QC 1 sees the values as transformed; the rest see them cleaned up like the saved CSV
+    sub = finalize(raw_sub)
+
+    lineup = None
+    found = []
+    for check in CHECKS:
+        if qcs is not None and check.qc not in qcs:
+            continue
+        if check.qc in LINEUP_CHECKS:
+            if teams is None:
+                continue
+            if lineup is None:
+                lineup = track(df, teams)
+            found += check.func(df, sub, lineup)
+        elif check.qc in FLAG_CHECKS:
+            found += check.func(df, sub, flags)
+        else:
+            found += check.func(df, raw_sub if check.qc == 1 else sub)
+    return sort_violations(found)
+
+
+def report(violations):
+    # Rebuild the QC log text exactly as the checks used to print it
+    lines = []
+    for check, owned in _by_check(violations):
+        if not owned:
+            lines.append(check.passed)
+        elif check.group:
+            for kind in check.kinds:
+                events = [v.event for v in owned if v.kind == kind]
+                if events:
+                    lines.append(check.group[kind].format(events=events))
+        else:
+            lines += [v.line for v in owned]
+    return ''.join(line + '\n' for line in lines)
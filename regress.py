@@ -0,0 +1,113 @@
+import argparse
+import random
+import sys
+
+from loadtest import synthetic_export
+from layout import RAW_COLUMNS, TEXT_COLUMNS
+from pipeline import available_engines
+from processing import process_upload
+from incremental import MatchHistory
+
+
+# ---------------------------
+# Regression checks
+# ---------------------------
+# Checks on synthetic exports (loadtest.synthetic_export) that every change to the
+# transform or QC rules should keep passing:
+#
+#   - engines: the polars and stages engines give the same CSV and QC log as pandas, byte for byte
+#   - incremental: re-uploading an edited export (cells changed, raids inserted and deleted),
+#     which only re-checks the edited rows, gives the same CSV and QC log as processing it anew
+#
+#   python regress.py [--seeds 10] [--raids 200]
+#
+# Prints one line per failure and exits 1 if there was any.
+
+MATCH_ID = 6464
+FLAG_IDX = [i for i, c in enumerate(RAW_COLUMNS) if c not in TEXT_COLUMNS]
+
+
+def _corrupt(lines, r, cells=20):
+    # Tagging mistakes in random raid rows: flags set, cleared or blank
+    lines = list(lines)
+    raids = [i for i, line in enumerate(lines) if line.startswith('Raid ')]
+    for _ in range(cells):
+        i = r.choice(raids)
+        row = lines[i].split(';')
+        row[r.choice(FLAG_IDX)] = r.choice(['1', '0', ''])
+        lines[i] = ';'.join(row)
+    return lines
+
+
+def _export(lines):
+    return '\n'.join(lines).encode('utf-8')
+
+
+def _edit(lines, r, extra):
+    # A corrected re-upload: a few cells changed, raids from extra inserted, raids deleted
+    lines = _corrupt(lines, r, cells=r.randint(1, 5))
+    raids = [i for i, line in enumerate(lines) if line.startswith('Raid ')]
+    i = r.choice(raids)
+    lines[i:i] = r.sample(extra, r.randint(0, 3))
+    i = r.choice(raids)
+    del lines[i:i + r.randint(0, 3)]
+    return lines
+
+
+def _upload(content, engine="pandas", history=None):
+    result = process_upload(content, MATCH_ID, engine=engine, cache=None,
+                            history=MatchHistory() if history is None else history, metrics=None)
+    return result.processed.to_csv(index=False), result.report, result.delta
+
+
+# ------ Checks ------
+
+def check_engines(seed, raids):
+    content = _export(_corrupt(synthetic_export(raids, seed).decode('utf-8').splitlines(), random.Random(seed)))
+    expected = _upload(content)[:2]
+    for engine in available_engines():
+        if engine != 'pandas' and _upload(content, engine)[:2] != expected:
+            yield f"engines: seed {seed}: {engine} output differs from pandas"
+
+
+def check_incremental(seed, raids, steps=3):
+    r = random.Random(seed)
+    lines = _corrupt(synthetic_export(raids, seed).decode('utf-8').splitlines(), r)
+    extra = [line for line in synthetic_export(20, seed + 1000).decode('utf-8').splitlines() if line.startswith('Raid ')]
+    history = MatchHistory()
+    _upload(_export(lines), history=history)
+    for step in range(1, steps + 1):
+        lines = _edit(lines, r, extra)
+        engine = r.choice(available_engines())
+        *result, delta = _upload(_export(lines), engine, history)
+        if delta is None:
+            yield f"incremental: seed {seed}, edit {step}: the re-upload was processed in full"
+        elif result != list(_upload(_export(lines), engine)[:2]):
+            yield f"incremental: seed {seed}, edit {step} ({engine}): differs from processing the export anew"
+
+
+CHECKS = {'engines': check_engines, 'incremental': check_incremental}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check engine and incremental QC invariants on synthetic exports.")
+    parser.add_argument('--seeds', type=int, default=10, help="synthetic exports per check")
+    parser.add_argument('--raids', type=int, default=200)
+    parser.add_argument('--check', choices=list(CHECKS), action='append', help="only these checks (default: all)")
+    args = parser.parse_args(argv)
+
+    failed = 0
+    for name in args.check or list(CHECKS):
+        ok = 0
+        for seed in range(args.seeds):
+            found = list(CHECKS[name](seed, args.raids))
+            for line in found:
+                print(f"❌ {line}")
+            failed += len(found)
+            ok += not found
+        print(f"{name}: {ok}/{args.seeds} exports OK")
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,314 @@
+import argparse
+import json
+import os
+import sys
+import threading
+import urllib.error
+import urllib.parse
+import urllib.request
+import zlib
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from metrics import CONTENT_TYPE, METRICS
+
+
+# ---------------------------
+# Local HTTP ingestion service
+# ---------------------------
+# Same processing as the "Process CSV" button, for tagging stations that post exports directly.
+#
+#   python service.py --port 8600 --workers 4
+#
+#   POST /process?match_id=6464[&engine=polars]   body: raw export
+#   POST /batch   body: {"matches": [{"match_id": 6464, "content": "<raw export>"}, ...]}
+#   GET  /health
+#   GET  /metrics   Prometheus text format, see metrics.py
+#
+# Each match comes back as {"match_id", "match_no", "file_name", "raids", "csv", "qc", "report"},
+# or {"match_id", "error"} if the export could not be processed (/process: 422) or its worker
+# failed (/process: 500). A worker that died is replaced by a new one.
+#
+# Workers are started once and keep pandas, the layout tables and the last version of every
+# match they saw in memory. A Match ID always goes to the same worker, so a corrected
+# re-upload only re-processes its edited rows. Workers send a summary of every upload back
+# with its result, and the metrics are kept here, in the HTTP process.
+
+DEFAULT_PORT = 8600
+MAX_BODY_MB = 64
+
+
+# ------ Worker side ------
+
+def _warm():
+    import processing  # noqa: F401  (pandas, layout tables, cache)
+
+
+def process_one(content, match_id, engine):
+    from metrics import observation
+    from pipeline import PipelineError
+    from processing import process_upload
+
+    try:
+        processed = process_upload(content, match_id, engine=engine, metrics=None)
+    except PipelineError as e:
+        return {'match_id': match_id, 'error': str(e)}
+    except Exception as e:
+        return {'match_id': match_id, 'error': f"❌ An error occurred: {e}"}
+
+    result = {
+        'match_id': match_id,
+        'match_no': processed.match_no,
+        'file_name': processed.file_name,
+        'raids': len(processed.processed),
+        'csv': processed.processed.to_csv(index=False),
+        'qc': [{**v._asdict(), 'qc': int(v.qc), 'row': int(v.row)} for v in processed.version.violations],
+        'report': processed.report,
+        'metrics': observation(processed, engine),
+    }
+    delta = processed.delta
+    if delta is not None:
+        result['changed'] = delta.changed
+        result['fixed'] = len(delta.fixed)
+        result['introduced'] = len(delta.introduced)
+    return result
+
+
+class WorkerError(Exception):
+    # A worker failed (or died) while processing a match
+    pass
+
+
+# A submitted match: the worker's future, and which worker (index, executor) runs it
+Job = namedtuple('Job', ['future', 'match_id', 'index', 'worker'])
+
+
+class WorkerPool:
+    # One single-process executor per worker, picked by Match ID
+
+    def __init__(self, workers=None):
+        workers = workers or os.cpu_count() or 1
+        self.workers = [ProcessPoolExecutor(max_workers=1) for _ in range(workers)]
+        self._lock = threading.Lock()
+        # Start every worker now rather than on its first request
+        for w in self.workers:
+            w.submit(_warm).result()
+
+    def _replace(self, index, broken):
+        # A new executor in place of a broken one (once, however many requests saw it break)
+        with self._lock:
+            if self.workers[index] is broken:
+                broken.shutdown(wait=False)
+                self.workers[index] = ProcessPoolExecutor(max_workers=1)
+                self.workers[index].submit(_warm)
+            return self.workers[index]
+
+    def submit(self, content, match_id, engine="pandas"):
+        index = zlib.crc32(str(match_id).encode()) % len(self.workers)
+        worker = self.workers[index]
+        try:
+            future = worker.submit(process_one, content, match_id, engine)
+        except BrokenProcessPool:
+            worker = self._replace(index, worker)
+            future = worker.submit(process_one, content, match_id, engine)
+        return Job(future, match_id, index, worker)
+
+    def result(self, job, engine, metrics=METRICS):
+        # The worker's result, with its upload recorded in metrics. WorkerError if the worker failed
+        try:
+            result = job.future.result()
+        except Exception as e:
+            metrics.record_failure(engine)
+            if isinstance(e, BrokenProcessPool):
+                self._replace(job.index, job.worker)
+            raise WorkerError(f"❌ Worker failed on Match ID {job.match_id}: {e or type(e).__name__}")
+        obs = result.pop('metrics', None)
+        if obs is not None:
+            metrics.record(obs)
+        else:
+            metrics.record_failure(engine)
+        return result
+
+    def shutdown(self):
+        for w in self.workers:
+            w.shutdown()
+
+
+# ------ HTTP side ------
+
+class BadRequest(Exception):
+    pass
+
+
+def _match_id(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise BadRequest(f"Invalid Match ID: {value!r}")
+
+
+def _engine(value):
+    from pipeline import ENGINES
+    if value not in ENGINES:
+        raise BadRequest(f"Unknown engine '{value}', expected one of {ENGINES}")
+    return value
+
+
+class Handler(BaseHTTPRequestHandler):
+    pool = None
+    protocol_version = 'HTTP/1.1'
+
+    def _reply(self, status, payload):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _text(self, status, text, content_type):
+        body = text.encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _body(self):
+        value = self.headers.get('Content-Length') or 0
+        try:
+            length = int(value)
+        except ValueError:
+            raise BadRequest(f"Invalid Content-Length: {value!r}")
+        if length < 0:
+            raise BadRequest(f"Invalid Content-Length: {value!r}")
+        if length > MAX_BODY_MB * 2**20:
+            raise BadRequest(f"Request body over {MAX_BODY_MB} MB")
+        return self.rfile.read(length)
+
+    def _result(self, job, engine):
+        # One /batch entry; a failed worker only fails its own matches
+        try:
+            return self.pool.result(job, engine)
+        except WorkerError as e:
+            return {'match_id': job.match_id, 'error': str(e)}
+
+    def do_GET(self):
+        path = urllib.parse.urlparse(self.path).path
+        if path == '/health':
+            self._reply(200, {'status': 'ok', 'workers': len(self.pool.workers)})
+        elif path == '/metrics':
+            self._text(200, METRICS.render(), CONTENT_TYPE)
+        else:
+            self._reply(404, {'error': f"Unknown path {self.path}"})
+
+    def do_POST(self):
+        url = urllib.parse.urlparse(self.path)
+        query = dict(urllib.parse.parse_qsl(url.query))
+        try:
+            body = self._body()
+            if url.path == '/process':
+                engine = _engine(query.get('engine', 'pandas'))
+                job = self.pool.submit(body, _match_id(query.get('match_id')), engine)
+                try:
+                    result = self.pool.result(job, engine)
+                except WorkerError as e:
+                    self._reply(500, {'match_id': job.match_id, 'error': str(e)})
+                    return
+                self._reply(422 if 'error' in result else 200, result)
+            elif url.path == '/batch':
+                try:
+                    request = json.loads(body)
+                    matches = [(_match_id(m['match_id']), m['content'].encode('utf-8')) for m in request['matches']]
+                except (ValueError, KeyError, TypeError, AttributeError):
+                    raise BadRequest('Expected {"matches": [{"match_id": ..., "content": ...}, ...]}')
+                engine = _engine(request.get('engine', 'pandas'))
+                jobs = [self.pool.submit(content, match_id, engine) for match_id, content in matches]
+                self._reply(200, {'results': [self._result(job, engine) for job in jobs]})
+            else:
+                self._reply(404, {'error': f"Unknown path {url.path}"})
+        except BadRequest as e:
+            self._reply(400, {'error': str(e)})
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve(host='127.0.0.1', port=DEFAULT_PORT, workers=None):
+    pool = WorkerPool(workers)
+    Handler.pool = pool
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    print(f"Serving on http://{host}:{server.server_port} with {len(pool.workers)} workers")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        pool.shutdown()
+
+
+# ------ Client ------
+
+def _post(url, data, content_type):
+    request = urllib.request.Request(url, data=data, headers={'Content-Type': content_type})
+    try:
+        with urllib.request.urlopen(request) as response:
+            return json.load(response)
+    except urllib.error.HTTPError as e:
+        return json.load(e)
+
+
+def submit(url, content, match_id, engine="pandas"):
+    query = urllib.parse.urlencode({'match_id': match_id, 'engine': engine})
+    return _post(f"{url}/process?{query}", content, 'text/csv')
+
+
+def submit_batch(url, exports, engine="pandas"):
+    # exports: [(match_id, raw export bytes), ...]
+    payload = {'engine': engine,
+               'matches': [{'match_id': m, 'content': c.decode('utf-8', errors='replace')} for m, c in exports]}
+    response = _post(f"{url}/batch", json.dumps(payload).encode('utf-8'), 'application/json')
+    if 'results' not in response:
+        raise BadRequest(response.get('error'))
+    return response['results']
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve the processing pipeline over HTTP, or submit exports to it.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--workers', type=int, help="worker processes (default: CPU count)")
+    parser.add_argument('--submit', nargs='+', metavar='FILE', help="post these exports (Match ID from file name)")
+    parser.add_argument('-o', '--out', default='.', help="output folder for --submit")
+    args = parser.parse_args(argv)
+
+    if not args.submit:
+        serve(args.host, args.port, args.workers)
+        return 0
+
+    from batch import _match_id as match_id_from_name
+
+    exports = []
+    for path in args.submit:
+        with open(path, 'rb') as f:
+            exports.append((match_id_from_name(path), f.read()))
+
+    os.makedirs(args.out, exist_ok=True)
+    failed = 0
+    for path, result in zip(args.submit, submit_batch(f"http://{args.host}:{args.port}", exports)):
+        if 'error' in result:
+            print(f"{path}: {result['error']}", file=sys.stderr)
+            failed += 1
+            continue
+        with open(os.path.join(args.out, result['file_name']), 'w', encoding='utf-8', newline='') as f:
+            f.write(result['csv'])
+        print(f"{path}: {result['raids']} raids, {len(result['qc'])} QC messages → {result['file_name']}")
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,246 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+from layout import (FLAG_COLUMNS, ZONE_COLS, ATT_SKILL_COLS, DS_SKILL_COLS, CA_COLS, DEF_POS_COLS,
+                    QOD_COLS, DSO_COLS)
+
+
+# ---------------------------
+# Raid similarity index (MinHash + LSH over active flags)
+# ---------------------------
+# Every raid is the set of its active zone, skill, defender position, QoD and DS flags.
+# Raids are compared by the Jaccard similarity of those sets. A 64-hash MinHash signature
+# is cut into 16 bands of 4; raids sharing any band are candidates, and only candidates
+# get their exact Jaccard computed. One index holds every season.
+#
+#   index = SimilarityIndex.load("archive/raid_similarity.npz")
+#   index.similar("M6464", "Raid 31", k=10)
+#   index.similar_to(["Z3", "Ankle hold", "LCorner"], k=10)
+
+SIMILARITY_COLS = ZONE_COLS + ATT_SKILL_COLS + DS_SKILL_COLS + CA_COLS + DEF_POS_COLS + QOD_COLS + DSO_COLS
+FEATURE = {c: i for i, c in enumerate(SIMILARITY_COLS)}
+FEATURE_FLAGS = np.array([FLAG_COLUMNS.index(c) for c in SIMILARITY_COLS])
+
+NUM_HASHES, BANDS = 64, 16
+ROWS = NUM_HASHES // BANDS      # 4 ranks of one byte each → one exact uint32 key per band
+CHUNK = 4096
+
+# MinHash permutations as a rank per feature. Fixed seed: signatures must stay comparable
+# across runs and saved files (changing it means rebuilding the index)
+RANKS = np.array([np.random.default_rng(1000 + h).permutation(len(SIMILARITY_COLS))
+                  for h in range(NUM_HASHES)], dtype=np.uint8)
+NO_FEATURE = np.uint8(len(SIMILARITY_COLS))
+
+assert len(SIMILARITY_COLS) <= 64, "features must fit one uint64 word"
+
+
+def _popcount(words):
+    if hasattr(np, 'bitwise_count'):
+        return np.bitwise_count(words).astype(np.int64)
+    return np.unpackbits(words.view(np.uint8).reshape(-1, 8), axis=1).sum(axis=1)
+
+
+def features(flags):
+    # flags: raid rows x FLAG_COLUMNS (0/1) → raid rows x SIMILARITY_COLS (bool)
+    return np.asarray(flags)[:, FEATURE_FLAGS].astype(bool)
+
+
+def band_keys(bits):
+    # bits: raid rows x SIMILARITY_COLS → raid rows x BANDS uint32 (the signature, 4 ranks per key)
+    sig = np.empty((len(bits), NUM_HASHES), dtype=np.uint8)
+    for start in range(0, len(bits), CHUNK):
+        part = bits[start:start + CHUNK]
+        sig[start:start + CHUNK] = np.where(part[:, None, :], RANKS[None], NO_FEATURE).min(axis=2)
+    return np.ascontiguousarray(sig).view('<u4').astype(np.uint32)
+
+
+def pack_features(bits):
+    # raid rows x SIMILARITY_COLS → one uint64 per raid, bit i = SIMILARITY_COLS[i]
+    weights = np.uint64(1) << np.arange(len(SIMILARITY_COLS), dtype=np.uint64)
+    return (bits.astype(np.uint64) * weights).sum(axis=1, dtype=np.uint64)
+
+
+def feature_names(word):
+    return [c for i, c in enumerate(SIMILARITY_COLS) if int(word) >> i & 1]
+
+
+class SimilarityIndex:
+
+    def __init__(self, words=None, keys=None, match_codes=None, events=None, matches=None, seasons=None,
+                 order=None):
+        self.words = np.zeros(0, dtype=np.uint64) if words is None else words
+        self.keys = np.zeros((0, BANDS), dtype=np.uint32) if keys is None else keys
+        self.match_codes = np.zeros(0, dtype=np.int32) if match_codes is None else match_codes
+        self.events = np.zeros(0, dtype='U1') if events is None else events
+        self.matches = [] if matches is None else list(matches)
+        self.seasons = [] if seasons is None else list(seasons)
+        # Per band, row numbers ordered by that band's key; rows added since the last query
+        # are appended unsorted and merged in by _buckets()
+        self._order = np.zeros((BANDS, 0), dtype=np.int64) if order is None else order.astype(np.int64)
+        self._sorted = None
+
+    def __len__(self):
+        return len(self.words)
+
+    # ------ Updates ------
+
+    def _keep(self, keep):
+        # Drop rows where keep is False, renumbering the band orders
+        renumber = np.cumsum(keep) - 1
+        kept = keep[self._order]
+        self._order = renumber[self._order[kept].reshape(BANDS, -1)]
+        self.words, self.keys = self.words[keep], self.keys[keep]
+        self.match_codes, self.events = self.match_codes[keep], self.events[keep]
+        self._sorted = None
+
+    def add_match(self, match_id, season_id, events, flags):
+        # Replaces the raids of match_id if it was indexed before
+        match_id = str(match_id)
+        if match_id in self.matches:
+            code = self.matches.index(match_id)
+            self.seasons[code] = str(season_id)
+            self._keep(self.match_codes != code)
+        else:
+            code = len(self.matches)
+            self.matches.append(match_id)
+            self.seasons.append(str(season_id))
+
+        bits = features(flags)
+        first = len(self.words)
+        self.words = np.concatenate([self.words, pack_features(bits)])
+        self.keys = np.concatenate([self.keys, band_keys(bits)])
+        self.match_codes = np.concatenate([self.match_codes, np.full(len(bits), code, dtype=np.int32)])
+        self.events = np.concatenate([self.events, np.asarray(events, dtype=str)])
+        added = np.broadcast_to(np.arange(first, len(self.words)), (BANDS, len(self.words) - first))
+        self._order = np.concatenate([self._order, added], axis=1)
+        self._sorted = None
+
+    def remove_match(self, match_id):
+        match_id = str(match_id)
+        if match_id in self.matches:
+            self._keep(self.match_codes != self.matches.index(match_id))
+
+    # ------ Queries ------
+
+    def _buckets(self):
+        # (order, band keys in that order); the stable sort merges newly added rows into
+        # the already sorted ones, so it stays cheap as the index grows
+        if self._sorted is None:
+            by_band = self.keys.T
+            perm = np.argsort(np.take_along_axis(by_band, self._order, axis=1), axis=1, kind='stable')
+            self._order = np.take_along_axis(self._order, perm, axis=1)
+            self._sorted = np.take_along_axis(by_band, self._order, axis=1)
+        return self._order, self._sorted
+
+    def candidates(self, keys):
+        # Rows sharing at least one band key with keys (one raid's BANDS keys)
+        order, sorted_keys = self._buckets()
+        found = []
+        for b in range(BANDS):
+            lo, hi = np.searchsorted(sorted_keys[b], keys[b], side='left'), \
+                np.searchsorted(sorted_keys[b], keys[b], side='right')
+            found.append(order[b, lo:hi])
+        return np.unique(np.concatenate(found))
+
+    def _top(self, word, keys, k, skip=None, exact=False):
+        rows = np.arange(len(self.words)) if exact else self.candidates(keys)
+        if skip is not None:
+            rows = rows[rows != skip]
+        if not exact and len(rows) < k:
+            # Too few raids share a band (small flag sets): compare against every raid
+            return self._top(word, keys, k, skip, exact=True)
+        union = _popcount(self.words[rows] | word)
+        inter = _popcount(self.words[rows] & word)
+        # Two raids with no active flags count as identical
+        jaccard = np.where(union > 0, inter / np.maximum(union, 1), 1.0)
+        best = np.lexsort((rows, -jaccard))[:k]
+        rows = rows[best]
+        return pd.DataFrame({
+            'Season_ID': np.asarray(self.seasons, dtype=str)[self.match_codes[rows]] if len(rows) else [],
+            'Match_ID': np.asarray(self.matches, dtype=str)[self.match_codes[rows]] if len(rows) else [],
+            'Event_Number': self.events[rows],
+            'Jaccard': jaccard[best].round(4),
+            'Flags': [', '.join(feature_names(w)) for w in self.words[rows]],
+        })
+
+    def row(self, match_id, event):
+        match_id = str(match_id)
+        if match_id not in self.matches:
+            raise KeyError(f"Match {match_id} is not indexed")
+        rows = np.flatnonzero((self.match_codes == self.matches.index(match_id)) & (self.events == event))
+        if not len(rows):
+            raise KeyError(f"{event} of match {match_id} is not indexed")
+        return int(rows[0])
+
+    def similar(self, match_id, event, k=10, exact=False):
+        # Top-k raids most like one indexed raid (itself excluded).
+        # exact: compare against every raid instead of the LSH candidates
+        row = self.row(match_id, event)
+        return self._top(self.words[row], self.keys[row], k, skip=row, exact=exact)
+
+    def similar_to(self, flags, k=10, exact=False):
+        # Top-k raids most like a set of flag names (SIMILARITY_COLS)
+        unknown = [f for f in flags if f not in FEATURE]
+        if unknown:
+            raise KeyError(f"Not similarity flags: {unknown}")
+        bits = np.zeros((1, len(SIMILARITY_COLS)), dtype=bool)
+        bits[0, [FEATURE[f] for f in flags]] = True
+        return self._top(pack_features(bits)[0], band_keys(bits)[0], k, exact=exact)
+
+    # ------ Persistence ------
+
+    def save(self, path):
+        folder = os.path.dirname(path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        order, _ = self._buckets()
+        tmp = path + '.tmp.npz'
+        np.savez(tmp, words=self.words, keys=self.keys, match_codes=self.match_codes, events=self.events,
+                 matches=np.asarray(self.matches, dtype=str), seasons=np.asarray(self.seasons, dtype=str),
+                 order=order.astype(np.int32), features=np.asarray(SIMILARITY_COLS))
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path):
+        if not os.path.exists(path):
+            return cls()
+        with np.load(path) as data:
+            if data['features'].tolist() != SIMILARITY_COLS:
+                raise ValueError(f"{path} was built for other flag columns; rebuild it")
+            return cls(data['words'], data['keys'], data['match_codes'], data['events'],
+                       data['matches'].tolist(), data['seasons'].tolist(), data['order'])
+
+
+def update_similarity(path, version):
+    # version: incremental.MatchVersion of one processed match
+    processed = version.processed
+    index = SimilarityIndex.load(path)
+    index.add_match(processed['Match_ID'].iloc[0], processed['Season_ID'].iloc[0],
+                    processed['Event_Number'], version.flags)
+    index.save(path)
+    return index
+
+
+# python similarity.py archive/raid_similarity.npz M6464 "Raid 31" -k 10
+# python similarity.py archive/raid_similarity.npz --flags Z3 "Ankle hold" LCorner
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Find the raids most similar to a raid or a set of flags.")
+    parser.add_argument('index')
+    parser.add_argument('match_id', nargs='?')
+    parser.add_argument('event', nargs='?')
+    parser.add_argument('--flags', nargs='+', help="search by these flags instead of a raid")
+    parser.add_argument('-k', type=int, default=10)
+    parser.add_argument('--exact', action='store_true', help="compare against every raid (slower)")
+    args = parser.parse_args()
+
+    index = SimilarityIndex.load(args.index)
+    if args.flags:
+        found = index.similar_to(args.flags, args.k, args.exact)
+    else:
+        found = index.similar(args.match_id, args.event, args.k, args.exact)
+    found.to_csv(sys.stdout, index=False)
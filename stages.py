@@ -0,0 +1,317 @@
+import os
+import sys
+from collections import namedtuple
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import numpy as np
+import pandas as pd
+
+from layout import (
+    TOURNAMENT_ID, SEASON_ID, RAID_COLS, DEFENDER_COLS, RT_COLS, DT_COLS, DSO_COLS, RL_COLS,
+    BONUS_COLS, LABEL_GROUPS, DEFENDER_NAME_COLS, NAME_COLS, NEW_COLUMNS, OUTPUT_ORDER,
+    match_number,
+)
+from incremental import raiding_teams
+from pipeline import flag_matrix
+from qc import FLAG_CHECKS, LINEUP_CHECKS, QC_COLUMNS, run_qcs
+
+
+# ---------------------------
+# Stage Engine (column-dependency DAG)
+# ---------------------------
+# Same rules as pipeline.transform_pandas, split into stages that each declare the raw
+# columns they read, the output columns of other stages they read, and the columns they
+# write. A stage gets only what it declared, as NumPy arrays, and returns new arrays instead
+# of editing a shared frame, so stages with no path between them run side by side on a
+# thread pool.
+# Asking for some columns only runs the stages those columns need:
+#
+#   transform_stages(raid_rows, 6464)                                    # full OUTPUT_ORDER frame
+#   transform_stages(raid_rows, 6464, columns=['Event_Number', 'Raid_Length'])
+#   check(raid_rows, 6464, qcs=[11, 12])     # only the columns QC 11 and 12 read
+#
+# Output must stay identical to the pandas engine, like polars_backend.py.
+
+# raw: raw export columns read. inputs: other stages' output columns read (raw and output
+# names overlap, e.g. 'Bonus', so they are declared apart)
+Stage = namedtuple('Stage', ['name', 'raw', 'inputs', 'outputs', 'func'])
+
+WORKERS = min(8, (os.cpu_count() or 1) + 2)
+_POOL = ThreadPoolExecutor(max_workers=WORKERS, thread_name_prefix='stage')
+
+
+# ------ Array Helpers ------
+
+def _ints(values):
+    # Same coercion as pd.to_numeric(col.str.strip(), errors='coerce').fillna(0).astype(int),
+    # converting each distinct value once (flag columns hold little more than '0' and '1')
+    codes, uniques = pd.factorize(np.asarray(values, dtype=object), use_na_sentinel=False)
+    stripped = pd.Series(uniques, dtype=object).str.strip()
+    converted = pd.to_numeric(stripped, errors='coerce').fillna(0).to_numpy().astype(np.int64)
+    return converted[codes]
+
+
+def _set(data, cols):
+    # Raids x cols, True where the flag is 1
+    return np.column_stack([_ints(data[c]) == 1 for c in cols])
+
+
+def _weighted_sum(data, cols, prefix):
+    # Flag set → its numeric suffix (e.g., RT3 → 3), summed across the group
+    return _set(data, cols).astype(np.int64) @ np.array([int(c[len(prefix):]) for c in cols])
+
+
+def _labels(data, cols, sep):
+    # Flag set → column name, joined with sep; joined once per distinct combination of flags
+    patterns, inverse = np.unique(_set(data, cols), axis=0, return_inverse=True)
+    names = np.array(cols, dtype=object)
+    joined = np.array([sep.join(names[p]) for p in patterns], dtype=object)
+    return joined[inverse.reshape(-1)]
+
+
+def _seconds(values):
+    # "mm:ss,ms" or "hh:mm:ss,ms" → whole seconds, parsed once per distinct value
+    def parse(t):
+        parts = list(map(int, t.split(',')[0].split(':')))
+        if len(parts) == 2:
+            return parts[0] * 60 + parts[1]
+        if len(parts) == 3:
+            return parts[0] * 3600 + parts[1] * 60 + parts[2]
+        raise ValueError(f"Unreadable time '{t}'")
+
+    codes, uniques = pd.factorize(np.asarray(values, dtype=object), use_na_sentinel=False)
+    return np.array([parse(t) for t in uniques], dtype=np.int64)[codes]
+
+
+def _is(values, label):
+    return np.asarray(values == label, dtype=bool)
+
+
+# ------ Stages ------
+
+def _raid_number(data, n, match_id):
+    # Raid 1/2/3 keep non-1 values as they are, like the pandas engine
+    total = np.zeros(n, dtype=np.int64)
+    for c in RAID_COLS:
+        v = _ints(data[c])
+        total += np.where(v == 1, int(c[-1]), v)
+    return {'Raid_Number': total}
+
+
+def _renamed(data, n, match_id):
+    return {'Event_Number': data['Name'], 'Technical_Point': data['Technical Point'],
+            'All_Out': pd.to_numeric(data['All Out'], errors='coerce')}
+
+
+def _bonus(data, n, match_id):
+    yes = np.column_stack([_ints(data[c]) for c in BONUS_COLS]).max(axis=1) == 1
+    no = _ints(data['No Bonus']) == 1
+    return {'Bonus': np.where(yes & no, 'Yes No', np.where(yes, 'Yes', 'No')).astype(object)}
+
+
+def _label_stage(out, cols, sep):
+    return Stage(out, tuple(cols), (), (out,), lambda data, n, match_id: {out: _labels(data, cols, sep)})
+
+
+def _sum_stage(out, cols, prefix, base=0, sign=1):
+    return Stage(out, tuple(cols), (), (out,),
+                 lambda data, n, match_id: {out: base + sign * _weighted_sum(data, cols, prefix)})
+
+
+def _names(data, n, match_id):
+    # Same string handling as the pandas engine: "7-Rahul Chaudhari | 3-Pawan Sehrawat" → Title case names
+    parts = pd.Series(data['Player'], dtype=object).str.split(r'\s*\|\s*', expand=True)
+    names = parts.apply(lambda s: s.str.split('-', n=1).str[1].str.strip().str.title())
+    out = {}
+    for i, col in enumerate(NAME_COLS):
+        out[col] = names[i].to_numpy(dtype=object) if i < names.shape[1] else np.full(n, None, dtype=object)
+    return out
+
+
+def _time(data, n, match_id):
+    start, stop = _seconds(data['Start']), _seconds(data['Stop'])
+    secs = stop - start
+    return {'Time': np.array([f"{s // 60:02}:{s % 60:02}" for s in secs.tolist()], dtype=object),
+            'Video_Link': start}
+
+
+def _metadata(data, n, match_id):
+    rows = np.arange(1, n + 1, dtype=np.int64)
+    return {'Tournament_ID': np.full(n, TOURNAMENT_ID, dtype=object),
+            'Season_ID': np.full(n, SEASON_ID, dtype=object),
+            'Match_No': np.full(n, match_number(match_id), dtype=np.int64),
+            'Match_ID': np.full(n, "M" + str(match_id), dtype=object),
+            'Match_Raid_Number': rows,
+            'Video': rows.copy()}
+
+
+def _touch_points(data, n, match_id):
+    touched = sum(pd.notna(data[c]).astype(np.int64) for c in DEFENDER_NAME_COLS)
+    points = touched - data['Number_of_Defenders_Self_Out']
+    return {'Raiding_Touch_Points': np.where(_is(data['Outcome'], 'Successful'), points, 0).astype(np.int64)}
+
+
+def _all_out_points(data, n, match_id):
+    all_out = np.asarray(data['All_Out'] == 1, dtype=bool)
+    return {'Raiding_All_Out_Points': (_is(data['Outcome'], 'Successful') & all_out).astype(np.int64) * 2,
+            'Defending_All_Out_Points': (_is(data['Outcome'], 'Unsuccessful') & all_out).astype(np.int64) * 2}
+
+
+def _raider_self_out(data, n, match_id):
+    out = _is(data['Defensive_Skill'], 'Raider self out').astype(np.int64)
+    return {'Raider_Self_Out': out, 'Defending_Self_Out_Points': out.copy()}
+
+
+FILLED_NEW_COLUMNS = ['Video_Link', 'Video', 'Event', 'Raider_Self_Out',
+                      'Raiding_Touch_Points', 'Raiding_Bonus_Points', 'Raiding_Self_Out_Points',
+                      'Raiding_All_Out_Points', 'Defending_Capture_Points', 'Defending_Bonus_Points',
+                      'Defending_Self_Out_Points', 'Defending_All_Out_Points']
+EMPTY_COLUMNS = [c for c in NEW_COLUMNS if c not in FILLED_NEW_COLUMNS]
+
+STAGES = [
+    Stage('raid number', tuple(RAID_COLS), (), ('Raid_Number',), _raid_number),
+    Stage('renamed', ('Name', 'Technical Point', 'All Out'), (), ('Event_Number', 'Technical_Point', 'All_Out'),
+          _renamed),
+    _sum_stage('Number_of_Defenders', DEFENDER_COLS, 'D'),
+    Stage('bonus', (*BONUS_COLS, 'No Bonus'), (), ('Bonus',), _bonus),
+    *(_label_stage(out, cols, sep) for out, (cols, sep) in LABEL_GROUPS.items()),
+    _sum_stage('Raiding_Team_Points', RT_COLS, 'RT'),
+    _sum_stage('Defending_Team_Points', DT_COLS, 'DT'),
+    _sum_stage('Number_of_Defenders_Self_Out', DSO_COLS, 'DS'),
+    _sum_stage('Raid_Length', RL_COLS, 'RL', base=30, sign=-1),
+    Stage('names', ('Player',), (), tuple(NAME_COLS), _names),
+    Stage('time', ('Start', 'Stop'), (), ('Time', 'Video_Link'), _time),
+    Stage('metadata', (), (), ('Tournament_ID', 'Season_ID', 'Match_No', 'Match_ID', 'Match_Raid_Number', 'Video'),
+          _metadata),
+    Stage('empty columns', (), (), tuple(EMPTY_COLUMNS),
+          lambda data, n, match_id: {c: np.full(n, None, dtype=object) for c in EMPTY_COLUMNS}),
+
+    # ------ Points (read other stages' outputs) ------
+    Stage('bonus points', (), ('Bonus',), ('Raiding_Bonus_Points',),
+          lambda data, n, match_id: {'Raiding_Bonus_Points': _is(data['Bonus'], 'Yes').astype(np.int64)}),
+    Stage('touch points', (), ('Outcome', 'Number_of_Defenders_Self_Out', *DEFENDER_NAME_COLS),
+          ('Raiding_Touch_Points',), _touch_points),
+    Stage('all out points', (), ('Outcome', 'All_Out'), ('Raiding_All_Out_Points', 'Defending_All_Out_Points'),
+          _all_out_points),
+    Stage('self out points', (), ('Number_of_Defenders_Self_Out',), ('Raiding_Self_Out_Points',),
+          lambda data, n, match_id: {'Raiding_Self_Out_Points': data['Number_of_Defenders_Self_Out'].copy()}),
+    Stage('defending bonus points', (), ('Number_of_Defenders', 'Outcome'), ('Defending_Bonus_Points',),
+          lambda data, n, match_id: {'Defending_Bonus_Points': (
+              (data['Number_of_Defenders'] <= 3) & _is(data['Outcome'], 'Unsuccessful')).astype(np.int64)}),
+    Stage('raider self out', (), ('Defensive_Skill',), ('Raider_Self_Out', 'Defending_Self_Out_Points'), _raider_self_out),
+    Stage('capture points', (), ('Outcome', 'Raider_Self_Out'), ('Defending_Capture_Points',),
+          lambda data, n, match_id: {'Defending_Capture_Points': (
+              _is(data['Outcome'], 'Unsuccessful') & (data['Raider_Self_Out'] == 0)).astype(np.int64)}),
+    Stage('event', (), ('Outcome',), ('Event',), lambda data, n, match_id: {'Event': data['Outcome'].copy()}),
+]
+
+# Output column → the stage writing it
+PRODUCERS = {col: stage for stage in STAGES for col in stage.outputs}
+assert len(PRODUCERS) == sum(len(s.outputs) for s in STAGES), "two stages write the same column"
+assert set(PRODUCERS) == set(OUTPUT_ORDER), "stages must write exactly OUTPUT_ORDER"
+
+
+# ------ Planning ------
+
+def plan(columns=None):
+    # Stages needed for columns (default: all of OUTPUT_ORDER), each after the stages it reads from
+    unknown = [c for c in (columns or ()) if c not in PRODUCERS]
+    if unknown:
+        raise KeyError(f"No stage writes {unknown}")
+
+    order, seen = [], set()
+
+    def visit(stage):
+        if stage.name in seen:
+            return
+        seen.add(stage.name)
+        for col in stage.inputs:
+            visit(PRODUCERS[col])
+        order.append(stage)
+
+    for col in (OUTPUT_ORDER if columns is None else columns):
+        visit(PRODUCERS[col])
+    return order
+
+
+def raw_inputs(stages):
+    # Raw export columns the stages read
+    return sorted({col for s in stages for col in s.raw})
+
+
+def run_stages(raid_rows, match_id, stages, pool=_POOL):
+    # Runs every stage once its inputs are ready; independent stages run concurrently.
+    # Returns {column: array} for every column the stages wrote
+    n = len(raid_rows)
+    raw = {c: raid_rows[c].to_numpy(dtype=object) for c in raw_inputs(stages)}
+    values = {}
+    waiting = {s.name: (s, {PRODUCERS[c].name for c in s.inputs}) for s in stages}
+    running = {}
+
+    while waiting or running:
+        for name, (stage, deps) in list(waiting.items()):
+            if not deps:
+                del waiting[name]
+                data = {**{c: raw[c] for c in stage.raw}, **{c: values[c] for c in stage.inputs}}
+                running[pool.submit(stage.func, data, n, match_id)] = stage
+        if not running:
+            raise RuntimeError(f"Stages waiting on each other: {sorted(waiting)}")
+        done, _ = wait(running, return_when=FIRST_COMPLETED)
+        for future in done:
+            stage = running.pop(future)
+            values.update(future.result())
+            for _, deps in waiting.values():
+                deps.discard(stage.name)
+    return values
+
+
+def transform_stages(df, match_id, columns=None):
+    # df: raid rows with the 122 raw column names, all values as strings
+    # columns: only these output columns, in this order (default: OUTPUT_ORDER)
+    columns = OUTPUT_ORDER if columns is None else list(columns)
+    values = run_stages(df, match_id, plan(columns))
+    return pd.DataFrame({c: values[c] for c in columns}, index=df.index)
+
+
+# ------ Checking a subset of QCs ------
+
+def qc_columns(qcs):
+    # Output columns the given QCs read, in OUTPUT_ORDER
+    needed = {'Event_Number'}.union(*(QC_COLUMNS[q] for q in qcs))
+    return [c for c in OUTPUT_ORDER if c in needed]
+
+
+def check(df, match_id, qcs):
+    # Violations of the given QC numbers only, computing just the columns they read
+    processed = transform_stages(df, match_id, columns=qc_columns(qcs))
+    flags = flag_matrix(df) if FLAG_CHECKS.intersection(qcs) else None
+    teams = raiding_teams(df) if LINEUP_CHECKS.intersection(qcs) else None
+    return run_qcs(processed, flags, qcs=set(qcs), teams=teams)
+
+
+# python stages.py export.csv 6464 --qc 11 12
+if __name__ == '__main__':
+    import argparse
+    from pipeline import extract_raids, read_raw
+    from qc import message
+
+    parser = argparse.ArgumentParser(description="Print the stage plan, or run only some QCs on an export.")
+    parser.add_argument('export', nargs='?')
+    parser.add_argument('match_id', nargs='?', type=int)
+    parser.add_argument('--qc', type=int, nargs='+', help="only these QC numbers")
+    parser.add_argument('--columns', nargs='+', help="only these output columns")
+    args = parser.parse_args()
+
+    columns = qc_columns(args.qc) if args.qc else args.columns
+    stages = plan(columns)
+    print(f"{len(stages)} of {len(STAGES)} stages, {len(raw_inputs(stages))} raw columns", file=sys.stderr)
+    if args.export is None:
+        for s in stages:
+            print(f"{s.name}: {', '.join((*s.raw, *s.inputs)) or '-'} → {', '.join(s.outputs)}")
+    else:
+        raids = extract_raids(read_raw(args.export))
+        if args.qc:
+            for v in check(raids, args.match_id, args.qc):
+                print(message(v))
+        else:
+            transform_stages(raids, args.match_id, columns).to_csv(sys.stdout, index=False)
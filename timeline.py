@@ -0,0 +1,94 @@
+import sys
+
+import numpy as np
+import pandas as pd
+
+
+# ---------------------------
+# Raid timeline (interval index over the match video)
+# ---------------------------
+# Every raid is the interval [Start, Stop] of the match video, in seconds:
+# Video_Link holds the start offset and Time the duration (see pipeline.py).
+# The intervals are sorted by start once; finding the raid on screen at video
+# time t is then a binary search.
+#
+#   timeline = Timeline(processed)
+#   timeline.raid_at(754)        # → 'Raid 31'
+
+
+def duration_seconds(time):
+    # Processed Time "mm:ss" (minutes may exceed 59 or be negative) → seconds
+    parts = time.astype(str).str.split(':', n=1, expand=True)
+    minutes = pd.to_numeric(parts[0], errors='coerce')
+    seconds = pd.to_numeric(parts[1], errors='coerce') if parts.shape[1] > 1 else np.nan
+    return minutes * 60 + seconds
+
+
+def intervals(df):
+    # (start, stop) seconds of every raid, as float Series on df's index (NaN if unknown)
+    start = pd.to_numeric(df['Video_Link'], errors='coerce').astype(float)
+    return start, start + duration_seconds(df['Time'])
+
+
+def clock(secs):
+    secs = int(secs)
+    sign, secs = ('-', -secs) if secs < 0 else ('', secs)
+    if secs >= 3600:
+        return f"{sign}{secs // 3600:02}:{secs % 3600 // 60:02}:{secs % 60:02}"
+    return f"{sign}{secs // 60:02}:{secs % 60:02}"
+
+
+class Timeline:
+
+    def __init__(self, df):
+        start, stop = intervals(df)
+        known = start.notna() & stop.notna()
+        order = np.argsort(start[known].to_numpy(), kind='stable')
+
+        self.rows = df.index[known.to_numpy()][order]
+        self.events = df.loc[self.rows, 'Event_Number'].to_numpy()
+        self.starts = start[known].to_numpy()[order]
+        self.stops = stop[known].to_numpy()[order]
+        # Latest stop among the raids starting at or before each one (overlaps)
+        self.reach = np.maximum.accumulate(self.stops) if len(self.stops) else self.stops
+
+    def __len__(self):
+        return len(self.rows)
+
+    def rows_at(self, t):
+        # Row indexes of every raid on screen at video time t, latest start first
+        k = np.searchsorted(self.starts, t, side='right')
+        found = []
+        while k > 0 and self.reach[k - 1] >= t:
+            k -= 1
+            if self.stops[k] >= t:
+                found.append(self.rows[k])
+        return found
+
+    def raid_at(self, t):
+        # Event_Number of the raid on screen at video time t (latest start wins), or None
+        k = np.searchsorted(self.starts, t, side='right')
+        while k > 0 and self.reach[k - 1] >= t:
+            k -= 1
+            if self.stops[k] >= t:
+                return self.events[k]
+        return None
+
+    def between(self, t0, t1):
+        # Row indexes of raids overlapping [t0, t1], in start order
+        k = np.searchsorted(self.starts, t1, side='right')
+        first = np.searchsorted(self.reach[:k], t0, side='left')
+        return [self.rows[i] for i in range(first, k) if self.stops[i] >= t0]
+
+
+def _to_seconds(text):
+    parts = [int(p) for p in text.split(':')]
+    return sum(p * 60 ** i for i, p in enumerate(reversed(parts)))
+
+
+# python timeline.py tagged_1_6464.csv 12:34
+if __name__ == '__main__':
+    processed = pd.read_csv(sys.argv[1])
+    timeline = Timeline(processed)
+    for text in sys.argv[2:]:
+        print(f"{text}: {timeline.raid_at(_to_seconds(text)) or 'no raid'}")